@@ -77,7 +77,7 @@ from . properties import M3SceneProperties, M3ObjectProperties
 from . utils.registration import get_core, get_tools, get_pie_menus
 from . utils.registration import register_classes, unregister_classes, register_keymaps, unregister_keymaps, register_icons, unregister_icons, register_msgbus, unregister_msgbus
 from . ui.menus import object_context_menu, mesh_context_menu, add_object_buttons, material_pick_button, outliner_group_toggles, cursor_spin
-from . handlers import update_object_axes_drawing, focus_HUD, surface_slide_HUD, update_group, update_msgbus
+from . handlers import update_object_axes_drawing, focus_HUD, surface_slide_HUD, update_group, update_msgbus, update_mesh_revisions, update_object_bounds, reset_object_bounds, clear_caches
 
 
 def register():
@@ -130,10 +130,16 @@ def register():
     bpy.app.handlers.undo_pre.append(update_object_axes_drawing)
     bpy.app.handlers.redo_pre.append(update_object_axes_drawing)
     bpy.app.handlers.load_pre.append(update_object_axes_drawing)
+    bpy.app.handlers.load_pre.append(clear_caches)
 
     bpy.app.handlers.depsgraph_update_post.append(focus_HUD)
     bpy.app.handlers.depsgraph_update_post.append(surface_slide_HUD)
     bpy.app.handlers.depsgraph_update_post.append(update_group)
+    bpy.app.handlers.depsgraph_update_post.append(update_mesh_revisions)
+    bpy.app.handlers.depsgraph_update_post.append(update_object_bounds)
+    bpy.app.handlers.frame_change_post.append(reset_object_bounds)
+    bpy.app.handlers.undo_post.append(reset_object_bounds)
+    bpy.app.handlers.redo_post.append(reset_object_bounds)
 
 
     # REGISTRATION OUTPUT
@@ -151,6 +157,7 @@ def unregister():
     bpy.app.handlers.undo_pre.remove(update_object_axes_drawing)
     bpy.app.handlers.redo_pre.remove(update_object_axes_drawing)
     bpy.app.handlers.load_pre.remove(update_object_axes_drawing)
+    bpy.app.handlers.load_pre.remove(clear_caches)
 
     from . handlers import focusHUD, surfaceslideHUD
 
@@ -163,6 +170,11 @@ def unregister():
     bpy.app.handlers.depsgraph_update_post.remove(focus_HUD)
     bpy.app.handlers.depsgraph_update_post.remove(surface_slide_HUD)
     bpy.app.handlers.depsgraph_update_post.remove(update_group)
+    bpy.app.handlers.depsgraph_update_post.remove(update_mesh_revisions)
+    bpy.app.handlers.depsgraph_update_post.remove(update_object_bounds)
+    bpy.app.handlers.frame_change_post.remove(reset_object_bounds)
+    bpy.app.handlers.undo_post.remove(reset_object_bounds)
+    bpy.app.handlers.redo_post.remove(reset_object_bounds)
 
 
     # MSGBUS
@@ -3,6 +3,11 @@ from bpy.app.handlers import persistent
 from . utils.draw import remove_object_axes_drawing_handler, draw_focus_HUD, draw_surface_slide_HUD
 from . utils.registration import get_prefs, reload_msgbus
 from . utils.group import update_group_name, select_group_children
+from . utils.mesh import bump_mesh_revision, mesh_revisions, clear_buffer_pool
+from . utils.graph import mesh_graphs
+from . utils.analysis import face_analyses, mesh_issues
+from . utils.selection import remove_selection_snapshot, selection_snapshots
+from . utils.raycast import remove_bvh, clear_bvh_cache, clear_evaluated_bvhs, remove_object_bounds, clear_object_bounds
 
 
 focusHUD = None
@@ -105,3 +110,61 @@ def surface_slide_HUD(scene):
         elif surfaceslideHUD and not surfaceslide:
             bpy.types.SpaceView3D.draw_handler_remove(surfaceslideHUD, 'WINDOW')
             surfaceslideHUD = None
+
+
+@persistent
+def update_mesh_revisions(scene, depsgraph):
+    for update in depsgraph.updates:
+        id = update.id.original
+
+        if isinstance(id, bpy.types.Object) and id.type == 'MESH':
+            mesh = id.data
+
+        elif isinstance(id, bpy.types.Mesh):
+            mesh = id
+
+        else:
+            continue
+
+        # any update, including selection changes, invalidates the selection snapshot
+        remove_selection_snapshot(mesh)
+
+        if update.is_updated_geometry:
+            bump_mesh_revision(mesh)
+            remove_bvh(mesh)
+
+
+@persistent
+def update_object_bounds(scene, depsgraph):
+    for update in depsgraph.updates:
+        if update.is_updated_transform or update.is_updated_geometry:
+            id = update.id.original
+
+            if isinstance(id, bpy.types.Object):
+                remove_object_bounds(id)
+
+
+@persistent
+def reset_object_bounds(none):
+    # frame changes and undo can change the geometry, like animated shape keys, without the depsgraph handler seeing it
+    clear_object_bounds()
+
+    # the same goes for evaluated meshes, like animated modifiers, whose bvhs are validated by the original mesh's revision
+    clear_evaluated_bvhs()
+
+
+@persistent
+def clear_caches(none):
+    # mesh caches are keyed by memory address, which will be reused by the meshes of the next file
+    mesh_revisions.clear()
+    mesh_graphs.clear()
+    face_analyses.clear()
+    mesh_issues.clear()
+    selection_snapshots.clear()
+    clear_bvh_cache()
+
+    # pooled buffers aren't invalid after loading, but may be holding on to the memory of a much larger scene
+    clear_buffer_pool()
+
+    # object bounds are keyed by memory address too
+    clear_object_bounds()
@@ -1,9 +1,10 @@
 import bpy
 from bpy.props import BoolProperty, EnumProperty, FloatProperty
 import bmesh
-from mathutils.geometry import distance_point_to_plane
-import math
+import numpy as np
+import time
 from .. items import cleanup_select_items
+from .. utils.analysis import get_bmesh_arrays, get_redundant_verts, get_redundant_edges, get_face_analysis, get_face_mask, get_mesh_issues, get_cached_mesh_issues
 
 
 class CleanUp(bpy.types.Operator):
@@ -34,8 +35,19 @@ class CleanUp(bpy.types.Operator):
 
     view_selected: BoolProperty(name="View Selected", default=False)
 
+    analyse: BoolProperty(name="Analyse Only", description="Only count what would be cleaned up, without changing the mesh", default=False, options={'SKIP_SAVE'})
+
+    # hidden
+    summary = None
+
+    # the mesh and revision of the face analysis used by the last execution, kept on the class, as the redo panel executes a new instance
+    analysis_revision = None
+
     def draw(self, context):
         layout = self.layout
+
+        layout.prop(self, "analyse", toggle=True)
+
         box = layout.box()
 
         col = box.column()
@@ -71,6 +83,17 @@ class CleanUp(bpy.types.Operator):
         r.active = self.recalc_normals
         r.prop(self, "flip_normals", text="Flip", toggle=True)
 
+        if self.summary:
+            box = layout.box()
+            col = box.column(align=True)
+
+            for line in self.summary:
+                col.label(text=line)
+
+        # the selection only applies to the clean up in edit mode
+        if context.mode == 'OBJECT' or self.analyse:
+            return
+
         box = layout.box()
         col = box.column(align=True)
 
@@ -92,15 +115,45 @@ class CleanUp(bpy.types.Operator):
 
     @classmethod
     def poll(cls, context):
-        return context.mode == "EDIT_MESH"
+        if context.mode == 'EDIT_MESH':
+            return True
+
+        elif context.mode == 'OBJECT':
+            return [obj for obj in context.selected_objects if obj.type == 'MESH']
 
     def execute(self, context):
+        # forget the previous execution's face analysis, unless it's this one being redone
+        if not self.options.is_repeat:
+            CleanUp.analysis_revision = None
+
+        if context.mode == 'OBJECT':
+            if self.analyse:
+                self.summary = self.get_issues_summary(self.analyse_objects(context))
+
+            else:
+                self.summary = self.get_summary(self.clean_up_objects(context))
+
+            self.report({'INFO'}, self.summary[0])
+            return {'FINISHED'}
+
         active = context.active_object
 
-        bm = self.clean_up(active)
+        bm = bmesh.from_edit_mesh(active.data)
+
+        # only analyse, the mesh isn't changed, so it doesn't need to be updated either
+        if self.analyse:
+            self.summary = self.get_issues_summary([get_mesh_issues(bm, active.data, distance=self.distance, angle=self.dissolve_redundant_angle, redo=self.options.is_repeat)])
+            self.report({'INFO'}, self.summary[0])
+            return {'FINISHED'}
+
+        self.summary = None
+
+        # cached indices are only safe to act on, if the mesh hasn't changed since they were found, so never accept them on redo alone
+        issues = get_cached_mesh_issues(bm, active.data, distance=self.distance, angle=self.dissolve_redundant_angle)
+        self.clean_up(bm, issues=issues)
 
         if self.select:
-            self.select_geometry(bm)
+            self.select_geometry(bm, active.data)
 
         bmesh.update_edit_mesh(active.data)
 
@@ -109,60 +162,216 @@ class CleanUp(bpy.types.Operator):
 
         return {'FINISHED'}
 
-    def clean_up(self, active):
-        bm = bmesh.from_edit_mesh(active.data)
+    def clean_up(self, bm, timings=None, issues=None):
+        '''
+        run the clean up pipeline on the bmesh, optionally collecting the time each stage took in the timings dict
+        issues: the cached analysis of the bmesh, its index sets are used instead of searching again, as long as the bmesh wasn't changed by a previous stage
+        '''
+
+        def stage(name, start):
+            if timings is not None:
+                timings[name] = time.time() - start
+
         bm.normal_update()
         bm.verts.ensure_lookup_table()
 
         if self.remove_doubles:
-            bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=self.distance)
+            start = time.time()
+            doubles = self.get_cached_elements(bm, issues, 'doubles')
+
+            # remove_doubles() is just find_doubles() and weld_verts()
+            if doubles is not None:
+                bmesh.ops.weld_verts(bm, targetmap=dict(zip(doubles[0::2], doubles[1::2])))
+
+            else:
+                bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=self.distance)
+
+            stage('doubles', start)
 
         if self.dissolve_degenerate:
+            start = time.time()
             bmesh.ops.dissolve_degenerate(bm, edges=bm.edges, dist=self.distance)
+            stage('degenerate', start)
 
         if self.delete_loose:
-            self.delete_loose_geometry(bm)
+            start = time.time()
+            self.delete_loose_geometry(bm, issues)
+            stage('loose', start)
 
         if self.dissolve_redundant:
-            self.dissolve_redundant_geometry(bm)
+            start = time.time()
+            self.dissolve_redundant_geometry(bm, issues)
+            stage('redundant', start)
 
         if self.recalc_normals:
+            start = time.time()
             bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
 
             if self.flip_normals:
                 for f in bm.faces:
                     f.normal_flip()
-        return bm
 
-    def delete_loose_geometry(self, bm):
+            stage('normals', start)
+
+    def get_meshes(self, context):
+        '''
+        return the meshes of the selected mesh objects, each only once, even if it is shared by several objects, and the names of the objects using it
+        '''
+
+        meshes = {}
+
+        for obj in context.selected_objects:
+            if obj.type == 'MESH':
+                meshes.setdefault(obj.data, []).append(obj.name)
+
+        return meshes
+
+    def analyse_objects(self, context):
+        '''
+        analyse the meshes of all selected mesh objects in object mode, and return their issues, see utils.analysis.analyse_issues()
+        '''
+
+        issues = []
+
+        for mesh in self.get_meshes(context):
+            bm = bmesh.new()
+            bm.from_mesh(mesh)
+
+            issues.append(get_mesh_issues(bm, mesh, distance=self.distance, angle=self.dissolve_redundant_angle, redo=self.options.is_repeat))
+            bm.free()
+
+        return issues
+
+    def clean_up_objects(self, context):
+        '''
+        clean up the meshes of all selected mesh objects in object mode, each mesh only once, even if it is shared by several objects
+        return a report per mesh, with the names of the objects using it, the removed vert, edge and face counts and the timings of each stage
+        '''
+
+        report = []
+
+        for mesh, names in self.get_meshes(context).items():
+            start = time.time()
+
+            bm = bmesh.new()
+            bm.from_mesh(mesh)
+
+            counts = (len(bm.verts), len(bm.edges), len(bm.faces))
+            timings = {}
+
+            issues = get_cached_mesh_issues(bm, mesh, distance=self.distance, angle=self.dissolve_redundant_angle)
+            self.clean_up(bm, timings=timings, issues=issues)
+
+            removed = tuple(before - after for before, after in zip(counts, (len(bm.verts), len(bm.edges), len(bm.faces))))
+
+            bm.to_mesh(mesh)
+            bm.free()
+
+            mesh.update()
+
+            report.append({'mesh': mesh.name,
+                           'objects': names,
+                           'removed': removed,
+                           'timings': timings,
+                           'time': time.time() - start})
+
+        return report
+
+    def get_cached_elements(self, bm, issues, name, seq=None):
+        '''
+        return the elements of a cached index set of the issues, but only as long as the bmesh still has the analysed element counts, otherwise None
+        without a seq, the doubles are returned, as a flat list of alternating duplicate and target verts
+        '''
+
+        if issues and (len(bm.verts), len(bm.edges), len(bm.faces)) == issues['counts']:
+            seq = seq if seq is not None else bm.verts
+            seq.ensure_lookup_table()
+
+            return [seq[idx] for idx in issues[name].ravel().tolist()]
+
+    def get_issues_summary(self, issues):
+        '''
+        sum up the issues of one or several meshes, and return them as lines for the redo panel
+        '''
+
+        def count(name):
+            return sum(len(i[name]) for i in issues)
+
+        def count_faces(type):
+            return sum(int(get_face_mask(i['analysis'], type, threshold=self.planar_threshold).sum()) for i in issues)
+
+        loose = count('loose_verts') + count('loose_edges') + count('loose_faces')
+        redundant = count('redundant_verts') + count('redundant_edges')
+
+        return [f"Analysed {len(issues)} mesh{'es' if len(issues) > 1 else ''}: {count('doubles')} doubles, {loose} loose and {redundant} redundant elements",
+                f"Degenerate Edges: {count('degenerate_edges')}",
+                f"Loose: {count('loose_verts')} verts, {count('loose_edges')} edges, {count('loose_faces')} faces",
+                f"Redundant: {count('redundant_verts')} verts, {count('redundant_edges')} edges",
+                f"Non-Manifold Edges: {count('nonmanifold_edges')}, Non-Planar Faces: {count_faces('NON-PLANAR')}",
+                f"Tris: {count_faces('TRIS')}, Ngons: {count_faces('NGONS')}"]
+
+    def get_summary(self, report, limit=5):
+        '''
+        print the report to the terminal, and return a short summary of it, listing the slowest meshes
+        '''
+
+        removed = [sum(r['removed'][idx] for r in report) for idx in range(3)]
+        total = sum(r['time'] for r in report)
+
+        summary = [f"Cleaned up {len(report)} meshes of {sum(len(r['objects']) for r in report)} objects in {total:.2f}s, removed {removed[0]} verts, {removed[1]} edges, {removed[2]} faces"]
+
+        print(summary[0])
+
+        for r in sorted(report, key=lambda r: r['time'], reverse=True):
+            line = f"{', '.join(r['objects'])}: {r['time']:.3f}s, removed {r['removed'][0]} verts, {r['removed'][1]} edges, {r['removed'][2]} faces"
+
+            if len(summary) <= limit:
+                summary.append(line)
+
+            print(f" {line}")
+            print(f"  {', '.join(f'{name}: {t:.3f}s' for name, t in r['timings'].items())}")
+
+        return summary
+
+    def delete_loose_geometry(self, bm, issues=None):
         if self.delete_loose_verts:
-            loose_verts = [v for v in bm.verts if not v.link_edges]
+            loose_verts = self.get_cached_elements(bm, issues, 'loose_verts', bm.verts)
+
+            if loose_verts is None:
+                loose_verts = [v for v in bm.verts if not v.link_edges]
+
             bmesh.ops.delete(bm, geom=loose_verts, context="VERTS")
 
         if self.delete_loose_edges:
-            loose_edges = [e for e in bm.edges if not e.link_faces]
+            loose_edges = self.get_cached_elements(bm, issues, 'loose_edges', bm.edges)
+
+            if loose_edges is None:
+                loose_edges = [e for e in bm.edges if not e.link_faces]
+
             bmesh.ops.delete(bm, geom=loose_edges, context="EDGES")
 
         if self.delete_loose_faces:
-            loose_faces = [f for f in bm.faces if all([not e.is_manifold for e in f.edges])]
+            loose_faces = self.get_cached_elements(bm, issues, 'loose_faces', bm.faces)
+
+            if loose_faces is None:
+                loose_faces = [f for f in bm.faces if all([not e.is_manifold for e in f.edges])]
+
             bmesh.ops.delete(bm, geom=loose_faces, context="FACES")
 
-    def dissolve_redundant_geometry(self, bm):
+    def dissolve_redundant_geometry(self, bm, issues=None):
         '''
         dissolve redundant verts on straight edges
         dissolve redundant edges on flat faces
         '''
 
         if self.dissolve_redundant_edges:
-            manifold_edges = [e for e in bm.edges if e.is_manifold]
+            redundant_edges = self.get_cached_elements(bm, issues, 'redundant_edges', bm.edges)
 
-            redundant_edges = []
+            if redundant_edges is None:
+                bm.edges.ensure_lookup_table()
 
-            for e in manifold_edges:
-                angle = math.degrees(e.calc_face_angle(0))
-
-                if angle < 180 - self.dissolve_redundant_angle:
-                    redundant_edges.append(e)
+                arrays = get_bmesh_arrays(bm, loops=True)
+                redundant_edges = [bm.edges[idx] for idx in np.flatnonzero(get_redundant_edges(arrays, self.dissolve_redundant_angle)).tolist()]
 
             bmesh.ops.dissolve_edges(bm, edges=redundant_edges, use_verts=False)
 
@@ -172,53 +381,47 @@ class CleanUp(bpy.types.Operator):
 
         # also run vert removal after edge removal to ensure verts from symmetry center lines get removed properly
         if self.dissolve_redundant_verts:
-            two_edged_verts = [v for v in bm.verts if len(v.link_edges) == 2]
-
-            redundant_verts = []
+            redundant_verts = self.get_cached_elements(bm, issues, 'redundant_verts', bm.verts)
 
-            for v in two_edged_verts:
-                e1 = v.link_edges[0]
-                e2 = v.link_edges[1]
+            if redundant_verts is None:
+                bm.verts.ensure_lookup_table()
 
-                vector1 = e1.other_vert(v).co - v.co
-                vector2 = e2.other_vert(v).co - v.co
-
-                angle = min(math.degrees(vector1.angle(vector2)), 180)
-
-                if self.dissolve_redundant_angle < angle:
-                    redundant_verts.append(v)
+                arrays = get_bmesh_arrays(bm)
+                redundant_verts = [bm.verts[idx] for idx in np.flatnonzero(get_redundant_verts(arrays, self.dissolve_redundant_angle)).tolist()]
 
             bmesh.ops.dissolve_verts(bm, verts=redundant_verts)
 
-    def select_geometry(self, bm):
+    def select_geometry(self, bm, mesh):
         for f in bm.faces:
             f.select = False
 
         bm.select_flush(False)
 
-        if self.select_type == "NON-MANIFOLD":
-            edges = [e for e in bm.edges if not e.is_manifold]
+        # on redo, the clean up produces the same geometry again, unless its props were changed, so the cached analysis can just be re-thresholded
+        signature = tuple(getattr(self, name) for name in ['remove_doubles', 'dissolve_degenerate', 'distance', 'delete_loose', 'delete_loose_verts', 'delete_loose_edges', 'delete_loose_faces',
+                                                           'dissolve_redundant', 'dissolve_redundant_verts', 'dissolve_redundant_edges', 'dissolve_redundant_angle', 'recalc_normals', 'flip_normals'])
 
-            for e in edges:
-                e.select = True
+        # only the analysis of the execution being redone is accepted, and only if that execution made one
+        key = mesh.as_pointer()
+        redo = CleanUp.analysis_revision[1] if self.options.is_repeat and CleanUp.analysis_revision and CleanUp.analysis_revision[0] == key else None
 
-        elif self.select_type == "NON-PLANAR":
-            faces = [f for f in bm.faces if len(f.verts) > 3]
+        analysis = get_face_analysis(bm, mesh=mesh, redo=redo, signature=signature)
+        CleanUp.analysis_revision = (key, analysis['revision'])
 
-            for f in faces:
-                distances = [distance_point_to_plane(v.co, f.calc_center_median(), f.normal) for v in f.verts]
-
-                if any([d for d in distances if abs(d) > self.planar_threshold]):
-                    f.select_set(True)
+        if self.select_type == "NON-MANIFOLD":
+            bm.edges.ensure_lookup_table()
 
-        elif self.select_type == "TRIS":
-            faces = [f for f in bm.faces if len(f.verts) == 3]
+            for idx in np.flatnonzero(analysis['nonmanifold_edges']).tolist():
+                bm.edges[idx].select = True
 
-            for f in faces:
-                f.select = True
+        else:
+            bm.faces.ensure_lookup_table()
 
-        elif self.select_type == "NGONS":
-            faces = [f for f in bm.faces if len(f.verts) > 4]
+            # like before, only non-planar faces are selected with their verts and edges, tris and ngons only select the faces themselves
+            flush = self.select_type == "NON-PLANAR"
 
-            for f in faces:
-                f.select = True
+            for idx in np.flatnonzero(get_face_mask(analysis, self.select_type, threshold=self.planar_threshold)).tolist():
+                if flush:
+                    bm.faces[idx].select_set(True)
+                else:
+                    bm.faces[idx].select = True
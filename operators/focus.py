@@ -78,7 +78,7 @@ class Focus(bpy.types.Operator):
             bm = bmesh.from_edit_mesh(context.active_object.data)
             bm.normal_update()
 
-            nothing_selected = not [v for v in bm.verts if v.select]
+            nothing_selected = not context.active_object.data.total_vert_sel
 
             if nothing_selected:
                 for v in bm.verts:
@@ -52,7 +52,7 @@ class MaterialPicker(bpy.types.Operator):
                 hitobj, hitobj_eval, _, _, hitindex, _ = cast_obj_ray_from_mouse(self.mousepos, depsgraph=context.evaluated_depsgraph_get(), debug=False)
 
             elif context.mode == 'EDIT_MESH':
-                hitobj, _, _, hitindex, _, _ = cast_bvh_ray_from_mouse(self.mousepos, candidates=[obj for obj in context.visible_objects if obj.mode == 'EDIT'])
+                hitobj, _, _, hitindex, _ = cast_bvh_ray_from_mouse(self.mousepos, candidates=[obj for obj in context.visible_objects if obj.mode == 'EDIT'])
 
             if hitobj:
                 if context.mode == 'OBJECT':
@@ -1,7 +1,8 @@
 import bpy
 import bmesh
-from math import degrees
-from .. utils.mesh import unhide_deselect, join
+import numpy as np
+from .. utils.mesh import unhide_deselect, unhide, hide_faces, join, get_coords, get_face_bounds, get_array
+from .. utils.analysis import get_angles
 from .. utils.object import flatten
 
 
@@ -19,9 +20,9 @@ class MeshCut(bpy.types.Operator):
         target = context.active_object
         cutter = [obj for obj in context.selected_objects if obj != target][0]
 
-        # unhide both
-        unhide_deselect(target.data)
-        unhide_deselect(cutter.data)
+        # unhide both, only the states change, so the normals don't need to be recalculated
+        unhide_deselect(target.data, update=False)
+        unhide_deselect(cutter.data, update=False)
 
         # get depsgraph
         dg = context.evaluated_depsgraph_get()
@@ -36,9 +37,17 @@ class MeshCut(bpy.types.Operator):
         # clear cutter materials
         cutter.data.materials.clear()
 
+        # get the target faces, that the cutter can't possibly reach
+        crop = self.get_crop_mask(target, cutter)
+
         # join target and cutter
         join(target, [cutter], select=[1])
 
+        # hide the out of reach target faces, the intersection ignores hidden faces, so they are skipped in its overlap tests and cuts
+        # note that this only crops the intersection itself, the mode switches and bmesh conversions still process the whole target
+        if crop.any():
+            hide_faces(target.data, np.concatenate([crop, np.zeros(len(target.data.polygons) - len(crop), dtype=bool)]), update=False)
+
         # knife intersect
         bpy.ops.object.mode_set(mode='EDIT')
         if event.shift:
@@ -47,52 +56,59 @@ class MeshCut(bpy.types.Operator):
             bpy.ops.mesh.intersect(separate_mode='CUT')
         bpy.ops.object.mode_set(mode='OBJECT')
 
+        if crop.any():
+            unhide(target.data, update=False)
+
+        # get the cutter faces from the face tags, and in shift mode also the edges, that will be non-manifold once the cutter faces are gone
+        mesh = target.data
+
+        cutter_mask = get_array(mesh.polygon_layers_int[0].data, 'value', dtype=np.int32) > 0
+        non_manifold_mask = self.get_non_manifold_mask(mesh, cutter_mask) if event.shift else None
+
+        # mark the seams in one go, the bmesh carries them over
+        if event.shift:
+            mesh.edges.foreach_set('use_seam', get_array(mesh.edges, 'use_seam', dtype=bool) | non_manifold_mask)
+
         # remove cutter
         bm = bmesh.new()
-        bm.from_mesh(target.data)
+        bm.from_mesh(mesh)
         bm.normal_update()
-        bm.verts.ensure_lookup_table()
+        bm.faces.ensure_lookup_table()
+        bm.edges.ensure_lookup_table()
 
         i = bm.faces.layers.int.verify()
         s = bm.edges.layers.string.verify()
 
-        cutter_faces = [f for f in bm.faces if f[i] > 0]
+        cutter_faces = [bm.faces[idx] for idx in np.flatnonzero(cutter_mask).tolist()]
+
+        # the edges have to be fetched by index, before the delete changes the indices
+        if event.shift:
+            non_manifold = [bm.edges[idx] for idx in np.flatnonzero(non_manifold_mask).tolist()]
+
         bmesh.ops.delete(bm, geom=cutter_faces, context='FACES')
 
         # mark seams
         if event.shift:
-            non_manifold = [e for e in bm.edges if not e.is_manifold]
 
-            # mark them and collect the verts as well
+            # tag them and collect the verts as well, NOTE: bmesh string layers can only be set per edge, and meshes don't expose edge string layers
             verts = set()
 
             for e in non_manifold:
-                e.seam = True
                 e[s] = 'MESHCUT'.encode()
 
                 verts.update(e.verts)
 
             # merge the open, non-manifold seam
-            bmesh.ops.remove_doubles(bm, verts=list({v for e in non_manifold for v in e.verts}), dist=0.0001)
-
-            # fetch the still valid verts and collect the straight 2-edged ones
-            straight_edged = []
-
-            for v in verts:
-                if v.is_valid and len(v.link_edges) == 2:
-                    e1 = v.link_edges[0]
-                    e2 = v.link_edges[1]
-
-                    vector1 = e1.other_vert(v).co - v.co
-                    vector2 = e2.other_vert(v).co - v.co
+            bmesh.ops.remove_doubles(bm, verts=list(verts), dist=0.0001)
 
-                    angle = degrees(vector1.angle(vector2))
+            # fetch the still valid verts and dissolve the straight 2-edged ones
+            two_edged = [v for v in verts if v.is_valid and len(v.link_edges) == 2]
 
-                    if 179 <= angle <= 181:
-                        straight_edged.append(v)
+            if two_edged:
+                coords = np.fromiter((c for v in two_edged for co in (v.co, v.link_edges[0].other_vert(v).co, v.link_edges[1].other_vert(v).co) for c in co), dtype=np.float32, count=len(two_edged) * 9).reshape(-1, 3, 3)
+                angles = get_angles(coords[:, 1] - coords[:, 0], coords[:, 2] - coords[:, 0])
 
-            # dissolve them
-            bmesh.ops.dissolve_verts(bm, verts=straight_edged)
+                bmesh.ops.dissolve_verts(bm, verts=[two_edged[idx] for idx in np.flatnonzero(angles >= 179).tolist()])
 
         # remove face int layer, it's no longer needed
         bm.faces.layers.int.remove(i)
@@ -101,3 +117,42 @@ class MeshCut(bpy.types.Operator):
         bm.clear()
 
         return {'FINISHED'}
+
+    def get_crop_mask(self, target, cutter):
+        '''
+        return a mask of the target faces, whose bounding boxes don't overlap the cutter's bounding box in the target's local space
+        the boxes are padded a little, so faces merely touching the cutter are still considered
+        '''
+
+        coords = get_coords(cutter.data, mx=target.matrix_world.inverted() @ cutter.matrix_world)
+
+        if not len(coords):
+            return np.ones(len(target.data.polygons), dtype=bool)
+
+        cmin, cmax = coords.min(axis=0), coords.max(axis=0)
+
+        pad = (cmax - cmin).max() * 0.001 + 0.00001
+        cmin -= pad
+        cmax += pad
+
+        fmin, fmax = get_face_bounds(target.data)
+
+        return ~(np.all(fmax >= cmin, axis=1) & np.all(fmin <= cmax, axis=1))
+
+    def get_non_manifold_mask(self, mesh, cutter_mask):
+        '''
+        return a mask of the edges, that are non-manifold after the cutter faces are deleted
+        deleting faces removes the edges only used by them, loose edges stay however
+        '''
+
+        loop_totals = get_array(mesh.polygons, 'loop_total', dtype=np.int32)
+        loop_edges = get_array(mesh.loops, 'edge_index', dtype=np.int32)
+
+        edge_count = len(mesh.edges)
+
+        face_counts = np.bincount(loop_edges, minlength=edge_count)
+        target_face_counts = np.bincount(loop_edges[np.repeat(~cutter_mask, loop_totals)], minlength=edge_count)
+
+        remaining = (target_face_counts > 0) | (face_counts == 0)
+
+        return remaining & (target_face_counts != 2)
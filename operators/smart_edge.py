@@ -3,6 +3,7 @@ from bpy.props import BoolProperty, IntProperty, EnumProperty
 import bmesh
 from .. items import bridge_interpolation_items
 from .. utils.ui import popup_message
+from .. utils.selection import get_selected
 
 
 # TODO: why does bridging require custom props on this op, that are passe through, but bevel or offset edges doesn't???
@@ -53,9 +54,7 @@ class SmartEdge(bpy.types.Operator):
         bm.normal_update()
         bm.verts.ensure_lookup_table()
 
-        verts = [v for v in bm.verts if v.select]
-        faces = [f for f in bm.faces if f.select]
-        edges = [e for e in bm.edges if e.select]
+        verts, edges, faces = get_selected(active.data, bm)
 
 
         # KNIFE PROJECT
@@ -81,7 +80,6 @@ class SmartEdge(bpy.types.Operator):
 
             # vert mode
             if mode[0]:
-                verts = [v for v in bm.verts if v.select]
 
                 # KNIFE
                 if len(verts) <= 1:
@@ -122,7 +120,6 @@ class SmartEdge(bpy.types.Operator):
 
             # face mode
             elif mode[2]:
-                faces = [f for f in bm.faces if f.select]
 
                 # REGION TO LOOP
                 if faces:
@@ -166,6 +163,9 @@ class SmartEdge(bpy.types.Operator):
         if not verts or len(faces) == len(bm.faces):
             return False
 
+        edges = set(edges)
+        faces = set(faces)
+
         # check for each selected vert, if every connected edge or face is also selected
         for v in verts:
             if not all(e in edges for e in v.link_edges):
@@ -227,7 +227,7 @@ class SmartEdge(bpy.types.Operator):
             for v in verts:
                 bmesh.ops.connect_verts(bm, verts=[last, v])
 
-        verts = [v for v in bm.verts if v.select]
+        verts, _, _ = get_selected(active.data, bm, types={'VERT'})
         history = list(bm.select_history)
         last = history[-1] if history else None
 
@@ -1,6 +1,7 @@
 import bpy
 from bpy.props import BoolProperty
 import bmesh
+from .. utils.selection import get_selected
 
 
 class SmartFace(bpy.types.Operator):
@@ -37,7 +38,7 @@ class SmartFace(bpy.types.Operator):
 
         # vert and edge mode - create new face
         if self.mode[0] or self.mode[1]:
-            self.verts = [v for v in bm.verts if v.select]
+            self.verts, _, _ = get_selected(active.data, bm, types={'VERT'})
 
             if self.verts:
 
@@ -51,9 +52,7 @@ class SmartFace(bpy.types.Operator):
 
         # face mode - duplicate and separate selection
         elif self.mode[2]:
-            faces = [f for f in bm.faces if f.select]
-
-            if faces:
+            if active.data.total_face_sel:
                 bpy.ops.mesh.duplicate()
                 bpy.ops.mesh.separate(type='SELECTED')
 
@@ -3,13 +3,16 @@ from bpy.props import EnumProperty, BoolProperty
 from bpy_extras.view3d_utils import region_2d_to_origin_3d, region_2d_to_vector_3d
 from bl_ui.space_statusbar import STATUSBAR_HT_header as statusbar
 import bmesh
+import numpy as np
+import time
 from mathutils import Vector
-from mathutils.geometry import intersect_point_line, intersect_line_line
-from .. utils.graph import get_shortest_path
-from .. utils.ui import popup_message
+from mathutils.geometry import intersect_line_line
+from .. utils.graph import get_mesh_graph, get_shortest_paths
+from .. utils.ui import popup_message, init_modal_updates, queue_modal_update, is_modal_update_due, is_modal_budget_exceeded, finish_modal_update, finish_modal_updates
 from .. utils.draw import draw_line, draw_lines, draw_point
-from .. utils.raycast import cast_bvh_ray_from_mouse
-from .. utils.math import average_locations, get_center_between_verts
+from .. utils.selection import get_selected
+from .. utils.raycast import cast_bvh_ray_from_mouse, get_bvh, get_bmesh_bvh, get_face_coords
+from .. utils.math import average_locations, get_closest_edge_index, intersect_lines_line
 from .. items import smartvert_mode_items, smartvert_merge_type_items, smartvert_path_type_items
 
 
@@ -52,14 +55,16 @@ class SmartVert(bpy.types.Operator):
 
     # hidden
     wrongselection = False
+
+    # the mesh and revision of the graph used by the last execution, kept on the class, as the redo panel executes a new instance
+    graph_revision = None
     snapping = False
     passthrough = False
 
     @classmethod
     def poll(cls, context):
         if context.mode == 'EDIT_MESH' and tuple(context.scene.tool_settings.mesh_select_mode) == (True, False, False):
-            bm = bmesh.from_edit_mesh(context.active_object.data)
-            return [v for v in bm.verts if v.select]
+            return context.active_object.data.total_vert_sel
 
     def draw(self, context):
         layout = self.layout
@@ -119,68 +124,31 @@ class SmartVert(bpy.types.Operator):
 
 
     def modal(self, context, event):
-        context.area.tag_redraw()
 
-        # update mouse
-        self.mousepos = Vector((event.mouse_region_x, event.mouse_region_y))
+        # the mouse position and modifier keys are only up to date on input events, not on timer ticks
+        if event.type != 'TIMER':
 
-        # set snapping
-        self.is_snapping = event.ctrl
-        self.is_diverging = self.is_snapping and event.alt
+            # update mouse
+            self.mousepos = Vector((event.mouse_region_x, event.mouse_region_y))
 
-        if not self.is_snapping:
-            self.snap_coords = []
-            self.snap_proximity_coords = []
-            self.snap_ortho_coords = []
+            # set snapping
+            self.is_snapping = event.ctrl
+            self.is_diverging = self.is_snapping and event.alt
+
+            if not self.is_snapping:
+                self.snap_coords = []
+                self.snap_proximity_coords = []
+                self.snap_ortho_coords = []
 
         events = ['MOUSEMOVE', 'LEFT_CTRL', 'LEFT_ALT', 'RIGHT_CTRL', 'RIGHT_ALT']
 
+        # slide right away, unless the snapping is deferred, then the events are coalesced into a single update on a later event or timer tick
         if event.type in events:
-            if self.passthrough:
-                self.passthrough = False
-
-                # update the init_loc to compensate for the viewport change
-                self.loc = self.get_slide_vector_intersection(context)
-                self.init_loc = self.init_loc + self.loc - self.offset_loc
-
-            # snap to edge
-            elif event.ctrl:
-                hitobj, hitlocation, hitnormal, hitindex, hitdistance, cache = cast_bvh_ray_from_mouse(self.mousepos, candidates=self.snappable, bmeshes=self.snap_bms, bvhs=self.snap_bvhs, debug=False)
-
-                # cache bmeshes
-                if cache['bmesh']:
-                    for name, bm in cache['bmesh'].items():
-                        if name not in self.snap_bms:
-                            bm.faces.ensure_lookup_table()
-
-                            self.snap_bms[name] = bm
-
-                # cache bvhs
-                if cache['bvh']:
-                    for name, bvh in cache['bvh'].items():
-                        if name not in self.snap_bvhs:
-                            self.snap_bvhs[name] = bvh
+            queue_modal_update(self)
+            self.update_slide(context)
 
-                # snap to geometry
-                if hitobj:
-                    self.slide_snap(context, hitobj, hitlocation, hitindex)
-
-                # side normally if nothing is hit
-                else:
-                    self.snap_coords = []
-                    self.snap_proximity_coords = []
-                    self.snap_ortho_coords = []
-
-                    self.loc = self.get_slide_vector_intersection(context)
-
-                    self.slide(context)
-
-            # slide
-            else:
-                self.is_snapping = False
-                self.loc = self.get_slide_vector_intersection(context)
-
-                self.slide(context)
+        elif is_modal_update_due(self, event):
+            self.update_slide(context)
 
 
         # VIEWPORT control
@@ -196,6 +164,10 @@ class SmartVert(bpy.types.Operator):
 
         elif event.type in {'LEFTMOUSE', 'SPACE'}:
 
+            # finish the slide for the final mouse position
+            if self.modal_pending:
+                self.update_slide(context, defer=False)
+
             # dissolve edges when snapping
             if self.is_snapping:
 
@@ -207,7 +179,7 @@ class SmartVert(bpy.types.Operator):
                 self.bm.normal_update()
                 bmesh.update_edit_mesh(self.active.data)
 
-            self.finish()
+            self.finish(context)
 
             return {'FINISHED'}
 
@@ -219,36 +191,78 @@ class SmartVert(bpy.types.Operator):
             for v, data in self.verts.items():
                 v.co = data['co']
 
-            self.bm.normal_update()
-            bmesh.update_edit_mesh(self.active.data)
+            self.update_slide_normals()
+            bmesh.update_edit_mesh(self.active.data, destructive=False)
 
-            self.finish()
+            self.finish(context)
 
             return {'CANCELLED'}
 
         return {'RUNNING_MODAL'}
 
-    def finish(self):
+    def update_slide(self, context, defer=True):
+        '''
+        slide or snap the verts to the current mouse position
+        defer: skip the snapping, if the previous update took too long, the update then stays pending and is done on a later tick
+        '''
+
+        start = time.time()
+
+        if self.passthrough:
+            self.passthrough = False
+
+            # update the init_loc to compensate for the viewport change
+            self.loc = self.get_slide_vector_intersection(context)
+            self.init_loc = self.init_loc + self.loc - self.offset_loc
+
+        # snap to edge
+        elif self.is_snapping:
+            if defer and is_modal_budget_exceeded(self, context):
+                return
+
+            hitobj, hitlocation, hitnormal, hitindex, hitdistance = cast_bvh_ray_from_mouse(self.mousepos, candidates=self.snappable, bvhs=self.snap_bvhs, debug=False)
+
+            # snap to geometry
+            if hitobj:
+                self.slide_snap(context, hitobj, hitlocation, hitindex)
+
+            # side normally if nothing is hit
+            else:
+                self.snap_coords = []
+                self.snap_proximity_coords = []
+                self.snap_ortho_coords = []
+
+                self.loc = self.get_slide_vector_intersection(context)
+
+                self.slide(context)
+
+        # slide
+        else:
+            self.loc = self.get_slide_vector_intersection(context)
+
+            self.slide(context)
+
+        finish_modal_update(self, context, start)
+
+        context.area.tag_redraw()
+
+    def finish(self, context):
         bpy.types.SpaceView3D.draw_handler_remove(self.VIEW3D, 'WINDOW')
 
+        finish_modal_updates(self, context)
+        context.area.tag_redraw()
+
         # reset the statusbar
         statusbar.draw = self.bar_orig
 
-        # remove snap copy of active
-        bpy.data.meshes.remove(self.snap_copy.data, do_unlink=True)
-
-        # remove snap bmeshes and bhs
-        del self.snap_bms, self.snap_bvhs
-
     def invoke(self, context, event):
 
         # SLIDE EXTEND
         if self.slideoverride:
             bm = bmesh.from_edit_mesh(context.active_object.data)
-            verts = [v for v in bm.verts if v.select]
             history = list(bm.select_history)
 
-            if len(verts) == 1:
+            if context.active_object.data.total_vert_sel == 1:
                 popup_message("Select more than 1 vertex.")
                 return {'CANCELLED'}
 
@@ -264,7 +278,7 @@ class SmartVert(bpy.types.Operator):
                 self.bm.normal_update()
 
                 # get selected verts
-                selected = [v for v in bm.verts if v.select]
+                selected, _, _ = get_selected(self.active.data, self.bm, types={'VERT'})
                 history = list(self.bm.select_history)
 
                 # get each vert that is slid and the target it pushed away from or towards
@@ -279,6 +293,9 @@ class SmartVert(bpy.types.Operator):
                     last = history[-1]
                     self.verts = {v: {'co': v.co.copy(), 'target': last} for v in selected if v != last}
 
+                # init the slide arrays and the faces and verts, whose normals the slide affects
+                self.init_slide()
+
                 # get average target and slid vert locations in world space
                 self.target_avg = self.mx @ average_locations([data['target'].co for _, data in self.verts.items()])
                 self.origin = self.mx @ average_locations([v.co for v, _ in self.verts.items()])
@@ -300,24 +317,26 @@ class SmartVert(bpy.types.Operator):
                     # init snapping
                     self.is_snapping = False
                     self.is_diverging = False
-                    self.snap_bms = {}
-                    self.snap_bvhs = {}
                     self.snap_coords = []
                     self.snap_proximity_coords = []
                     self.snap_ortho_coords = []
 
-                    # create copy of the active to raycast on, this prevents an issue where the raycast flips from one face to the other because moving a vert changes the topology
-                    self.active.update_from_editmode()
-                    self.snap_copy = self.active.copy()
-                    self.snap_copy.data = self.active.data.copy()
+                    # raycast on a bvh snapshot of the active's unmodified bmesh, this prevents an issue where the raycast flips from one face to the other because moving a vert changes the topology
+                    # the other edit mesh objects use their cached bvhs
+                    self.snap_bvhs = {self.active.name: get_bmesh_bvh(self.bm)}
+                    self.snap_faces = {}
+                    self.bm.faces.ensure_lookup_table()
 
-                    # snappable objects are all edit mesh object nicluding the the active's copy
+                    # snappable objects are all edit mesh objects including the active
                     edit_mesh_objects = [obj for obj in context.visible_objects if obj.mode == 'EDIT' and obj != self.active]
-                    self.snappable = edit_mesh_objects + [self.snap_copy]
+                    self.snappable = edit_mesh_objects + [self.active]
 
                     # handlers
                     self.VIEW3D = bpy.types.SpaceView3D.draw_handler_add(self.draw_VIEW3D, (), 'WINDOW', 'POST_VIEW')
 
+                    # defer snapping if the slide can't keep up, and coalesce the mouse events in the meantime
+                    init_modal_updates(self)
+
                     # draw statusbar info
                     self.bar_orig = statusbar.draw
                     statusbar.draw = draw_slide_status(self)
@@ -341,11 +360,15 @@ class SmartVert(bpy.types.Operator):
         active = context.active_object
         topo = True if self.pathtype == "TOPO" else False
 
+        # forget the previous execution's graph, unless it's this one being redone
+        if not self.options.is_repeat:
+            SmartVert.graph_revision = None
+
         bm = bmesh.from_edit_mesh(active.data)
         bm.normal_update()
         bm.verts.ensure_lookup_table()
 
-        verts = [v for v in bm.verts if v.select]
+        verts, _, _ = get_selected(active.data, bm, types={'VERT'})
 
 
         # VERT BEVEL
@@ -374,7 +397,7 @@ class SmartVert(bpy.types.Operator):
                     history = self.validate_history(active, bm)
 
                     if history:
-                        path1, path2 = self.get_paths(bm, history, topo)
+                        path1, path2 = self.get_paths(active, bm, history, topo)
 
                         self.weld(active, bm, path1, path2)
                         return
@@ -390,32 +413,46 @@ class SmartVert(bpy.types.Operator):
                 history = self.validate_history(active, bm)
 
                 if history:
-                    path1, path2 = self.get_paths(bm, history, topo)
+                    path1, path2 = self.get_paths(active, bm, history, topo)
 
                     self.connect(active, bm, path1, path2)
                     return
 
             self.wrongselection = True
 
-    def get_paths(self, bm, history, topo):
+    def get_paths(self, active, bm, history, topo):
         pair1 = history[0:2]
         pair2 = history[2:4]
         pair2.reverse()
 
-        path1 = get_shortest_path(bm, *pair1, topo=topo, select=True)
-        path2 = get_shortest_path(bm, *pair2, topo=topo, select=True)
+        # the mesh graph is cached for redo panel changes and repeated calls on the same mesh, it also updates the vert indices
+        # on redo, only the graph of the execution being redone is accepted despite a revision change, and only if that execution used one
+        key = active.data.as_pointer()
+        redo = SmartVert.graph_revision[1] if self.options.is_repeat and SmartVert.graph_revision and SmartVert.graph_revision[0] == key else None
+
+        graph = get_mesh_graph(bm, mesh=active.data, redo=redo)
+        SmartVert.graph_revision = (key, graph['revision'])
+
+        # solve both paths in one go
+        # single sided searches, as merging and connecting depend on the exact same path being chosen among equally short ones
+        paths = get_shortest_paths(graph, [(pair1[0].index, pair1[1].index), (pair2[0].index, pair2[1].index)], topo=topo, bidirectional=False)
+
+        bm.verts.ensure_lookup_table()
+        path1, path2 = [[bm.verts[idx] for idx in path] for path in paths]
+
+        for v in path1 + path2:
+            v.select = True
 
         return path1, path2
 
     def validate_history(self, active, bm, lazy=False):
-        verts = [v for v in bm.verts if v.select]
         history = list(bm.select_history)
 
         # just check for the prence of any element in the history
         if lazy:
             return history
 
-        if len(verts) == len(history):
+        if active.data.total_vert_sel == len(history):
             return history
         return None
 
@@ -450,76 +487,120 @@ class SmartVert(bpy.types.Operator):
         # get distance in local space
         self.distance = (self.mx.to_3x3().inverted_safe() @ (self.init_loc - self.loc)).length * origin_dir.dot(move_dir)
 
-        self.coords = []
+        # BMVert.co is a live reference, so the slide coords don't need to be recreated
+        self.coords = list(self.slide_coords)
 
-        for v, data in self.verts.items():
-            init_co = data['co']
-            target = data['target']
+        for v, co in zip(self.slide_verts, (self.slide_init_coords + self.slide_dirs * self.distance).tolist()):
+            v.co = co
 
-            slidedir = (target.co - init_co).normalized()
-            v.co = init_co + slidedir * self.distance
+        self.update_slide_normals()
+        bmesh.update_edit_mesh(self.active.data, destructive=False)
 
-            self.coords.extend([v.co, target.co])
+    def init_slide(self):
+        '''
+        store the initial coords and the normalized slide directions of the slid verts as arrays, so the new coords can be calculated in one go
+        also collect the faces around the slid verts, and all of their verts, as only their normals change when sliding
+        '''
 
-        self.bm.normal_update()
-        bmesh.update_edit_mesh(self.active.data)
+        self.slide_verts = list(self.verts)
+
+        self.slide_init_coords = np.array([data['co'] for data in self.verts.values()], dtype=np.float64).reshape(-1, 3)
+        # the targets aren't slid themselves, so their coords stay the same too
+        targets = np.array([data['target'].co for data in self.verts.values()], dtype=np.float64).reshape(-1, 3)
+
+        self.slide_target_coords = targets
+
+        dirs = targets - self.slide_init_coords
+        lengths = np.linalg.norm(dirs, axis=1, keepdims=True)
+
+        # like Vector.normalized(), zero length vectors stay zero
+        self.slide_dirs = np.divide(dirs, lengths, out=np.zeros_like(dirs), where=lengths > 0)
+
+        self.slide_coords = [co for v, data in self.verts.items() for co in (v.co, data['target'].co)]
+
+        self.slide_faces = list({f for v in self.slide_verts for f in v.link_faces})
+        self.slide_normal_verts = list({v for f in self.slide_faces for v in f.verts} | set(self.slide_verts))
+
+    def update_slide_normals(self):
+        '''
+        update the normals of the faces around the slid verts first, and then of their verts, instead of the normals of the entire mesh
+        '''
+
+        for f in self.slide_faces:
+            f.normal_update()
+
+        for v in self.slide_normal_verts:
+            v.normal_update()
 
     def slide_snap(self, context, hitobj, hitlocation, hitindex):
         '''
         slide snap to edges of all edit mode objects
         '''
 
-        # get hitface from the cached bmesh
-        hitbm = self.snap_bms[hitobj.name]
-        hitface = hitbm.faces[hitindex]
+        # get the hitface's edges as start and end coord arrays, they don't change during the modal, so are cached per face
+        key = (hitobj.name, hitindex)
+
+        if key not in self.snap_faces:
+
+            # get the active's hitface coords from the bmesh, with the slid verts at their initial locations, matching the bvh snapshot
+            if hitobj == self.active:
+                hitface = np.array([self.verts[v]['co'] if v in self.verts else v.co for v in self.bm.faces[hitindex].verts], dtype=np.float64)
+
+            # get the other objects' hitface coords from the cached bvh arrays
+            else:
+                hitface = get_face_coords(get_bvh(hitobj), hitindex).astype(np.float64)
+
+            # edges in loop order
+            self.snap_faces[key] = (hitface, np.roll(hitface, -1, axis=0))
+
+        starts, ends = self.snap_faces[key]
 
         # hit location in hitobj's local space
         hitmx = hitobj.matrix_world
         hit = hitmx.inverted() @ hitlocation
 
         # get closest edge
-        edge = min([(e, (hit - intersect_point_line(hit, e.verts[0].co, e.verts[1].co)[0]).length, (hit - get_center_between_verts(*e.verts)).length) for e in hitface.edges], key=lambda x: (x[1] * x[2]) / x[0].calc_length())[0]
+        idx = get_closest_edge_index(hit, starts, ends)
+        edge = (Vector(starts[idx]), Vector(ends[idx]))
 
         # set snap coords for view3d drawing
-        self.snap_coords = [hitmx @ v.co for v in edge.verts]
+        self.snap_coords = [hitmx @ co for co in edge]
 
         # get snap coords in active's local space
         snap_coords = [self.mx.inverted_safe() @ co for co in self.snap_coords]
 
-        # init proximity and ortho coords for view3d drawing
+        # init slide, proximity and ortho coords for view3d drawing
+        self.coords = []
         self.snap_proximity_coords = []
         self.snap_ortho_coords = []
 
         # get intersection of individual slide dirs and snap coords
-        for v, data in self.verts.items():
-            init_co = data['co']
-            target = data['target']
+        snap_dir = np.array((snap_coords[0] - snap_coords[1]).normalized())
 
-            snap_dir = (snap_coords[0] - snap_coords[1]).normalized()
-            slide_dir = (init_co - target.co).normalized()
+        # check for parallel and almost parallel snap edges, these verts stay at their initial locations
+        # with a smaller dot product, intersect_lines_line() produces a guaranteed hit
+        points, others, valid = intersect_lines_line(self.slide_init_coords, self.slide_target_coords, *snap_coords)
+        valid &= np.abs(self.slide_dirs @ snap_dir) <= 0.999
 
-            # check for parallel and almost parallel snap edges, do nothing in this case
-            if abs(slide_dir.dot(snap_dir)) > 0.999:
-                v.co = init_co
+        coords = self.slide_init_coords.copy()
+        coords[valid] = others[valid] if self.is_diverging else points[valid]
 
-            # with a smaller dot product, interseect_line_line will produce a guaranteed hit
-            else:
-                i = intersect_line_line(init_co, target.co, *snap_coords)
+        for v, co in zip(self.slide_verts, coords.tolist()):
+            v.co = co
 
-                v.co = i[1 if self.is_diverging else 0] if i else init_co
+        # add coords to draw the slide 'edges', and the proximity and ortho coords, compared in single precision like the vert coords
+        coords = coords.astype(np.float32)
+        others = others.astype(np.float32)
 
-                # add coords to draw the slide 'edges'
-                if v.co != target.co:
-                    self.coords.extend([v.co, target.co])
+        for idx in np.flatnonzero(valid & np.any(coords != self.slide_target_coords.astype(np.float32), axis=1)).tolist():
+            self.coords.extend(self.slide_coords[idx * 2:idx * 2 + 2])
 
-                # add proximity coords
-                if i[1] != snap_coords[0]:
-                    self.snap_proximity_coords.extend([i[1], snap_coords[0]])
+        for idx in np.flatnonzero(valid & np.any(others != np.array(snap_coords[0], dtype=np.float32), axis=1)).tolist():
+            self.snap_proximity_coords.extend([Vector(others[idx]), snap_coords[0]])
 
-                # add ortho coords
-                if v.co != i[1]:
-                    self.snap_ortho_coords.extend([v.co, i[1]])
+        for idx in np.flatnonzero(valid & np.any(coords != others, axis=1)).tolist():
+            self.snap_ortho_coords.extend([Vector(coords[idx]), Vector(others[idx])])
 
 
-        self.bm.normal_update()
-        bmesh.update_edit_mesh(self.active.data)
+        self.update_slide_normals()
+        bmesh.update_edit_mesh(self.active.data, destructive=False)
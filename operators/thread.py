@@ -2,9 +2,10 @@ import bpy
 from bpy.props import IntProperty, FloatProperty, BoolProperty
 import bmesh
 from mathutils import Vector, Matrix
-from .. utils.selection import get_boundary_edges, get_edges_vert_sequences
+from .. utils.selection import get_boundary_edges, get_edges_vert_sequences, get_selected
 from .. utils.math import average_locations
-from .. utils.geometry import calculate_thread
+from .. utils.geometry import calculate_thread, get_thread_faces
+from .. utils.mesh import add_faces
 from .. utils.draw import draw_vector
 
 
@@ -59,8 +60,7 @@ class Thread(bpy.types.Operator):
         bm = bmesh.from_edit_mesh(active.data)
         bm.normal_update()
 
-        selverts = [v for v in bm.verts if v.select]
-        selfaces = [f for f in bm.faces if f.select]
+        selverts, _, selfaces = get_selected(active.data, bm, types={'VERT', 'FACE'})
 
         if selfaces:
             boundary = get_boundary_edges(selfaces)
@@ -155,64 +155,10 @@ class Thread(bpy.types.Operator):
         return {'CANCELLED'}
 
     def build_faces(self, bm, thread, bottom, top, smooth=False):
-        verts = []
+        '''
+        add the thread, bottom and top faces to the bmesh all at once, on smooth threads the edges along the thread and its ends are sharp
+        '''
 
-        for co in thread[0]:
-            v = bm.verts.new(co)
-            verts.append(v)
+        coords, indices, sizes, sharp = get_thread_faces(thread, bottom, top)
 
-        faces = []
-
-        for ids in thread[1]:
-            f = bm.faces.new([verts[idx] for idx in ids])
-            f.smooth = smooth
-            faces.append(f)
-
-            if smooth:
-                f.edges[0].smooth = False
-                f.edges[-2].smooth = False
-
-        bottom_verts = []
-
-        for co in bottom[0]:
-            v = bm.verts.new(co)
-            bottom_verts.append(v)
-
-        bottom_faces = []
-
-        for ids in bottom[1]:
-            f = bm.faces.new([bottom_verts[idx] for idx in ids])
-            f.smooth = smooth
-            bottom_faces.append(f)
-
-            if smooth:
-                if len(ids) == 4:
-                    f.edges[-2].smooth = False
-                    f.edges[0].smooth = False
-                else:
-                    f.edges[-1].smooth = False
-                    f.edges[1].smooth = False
-
-
-        top_verts = []
-
-        for co in top[0]:
-            v = bm.verts.new(co)
-            top_verts.append(v)
-
-        top_faces = []
-
-        for ids in top[1]:
-            f = bm.faces.new([top_verts[idx] for idx in ids])
-            f.smooth = smooth
-            top_faces.append(f)
-
-            if smooth:
-                if len(ids) == 4:
-                    f.edges[-2].smooth = False
-                    f.edges[0].smooth = False
-                else:
-                    f.edges[-1].smooth = False
-                    f.edges[1].smooth = False
-
-        return [v for v in verts + bottom_verts + top_verts if v.is_valid], faces + bottom_faces + top_faces
+        return add_faces(bm, coords, indices, sizes, smooth=smooth, sharp=sharp if smooth else None)
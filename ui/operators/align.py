@@ -4,7 +4,7 @@ import bmesh
 from mathutils import Vector, Matrix, geometry
 from ... utils.math import get_center_between_verts, create_rotation_difference_matrix_from_quat, get_loc_matrix, create_selection_bbox, get_right_and_up_axes
 from ... items import axis_items, align_type_items, axis_mapping_dict, align_direction_items, align_orientation_items
-from ... utils.selection import get_selected_vert_sequences
+from ... utils.selection import get_selected_vert_sequences, get_selected
 from ... utils.ui import popup_message
 
 
@@ -24,9 +24,7 @@ class AlignEditMesh(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         if context.mode == "EDIT_MESH":
-            active = context.active_object
-            bm = bmesh.from_edit_mesh(active.data)
-            return [v for v in bm.verts if v.select]
+            return context.active_object.data.total_vert_sel
 
     def invoke(self, context, event):
         if event.alt and event.ctrl:
@@ -59,7 +57,7 @@ class AlignEditMesh(bpy.types.Operator):
         bm.normal_update()
         bm.verts.ensure_lookup_table()
 
-        verts = [v for v in bm.verts if v.select]
+        verts, _, _ = get_selected(active.data, bm, types={'VERT'})
 
         # axis coordinates in local space
         if orientation == 'LOCAL':
@@ -159,9 +157,7 @@ class CenterEditMesh(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         if context.mode == "EDIT_MESH":
-            active = context.active_object
-            bm = bmesh.from_edit_mesh(active.data)
-            return [v for v in bm.verts if v.select]
+            return context.active_object.data.total_vert_sel
 
     def invoke(self, context, event):
         if event.alt and event.ctrl:
@@ -189,7 +185,7 @@ class CenterEditMesh(bpy.types.Operator):
         bm.normal_update()
         bm.verts.ensure_lookup_table()
 
-        verts = [v for v in bm.verts if v.select]
+        verts, _, _ = get_selected(active.data, bm, types={'VERT'})
 
         # use the single vert's coordinate as the origin
         if len(verts) == 1:
@@ -250,9 +246,7 @@ class AlignObjectToEdge(bpy.types.Operator):
 
             if active and sel:
                 for obj in [active] + sel:
-                    bm = bmesh.from_edit_mesh(obj.data)
-
-                    if len([e for e in bm.edges if e.select]) != 1:
+                    if obj.data.total_edge_sel != 1:
                         return False
                 return True
 
@@ -304,13 +298,13 @@ class AlignObjectToEdge(bpy.types.Operator):
         """
 
         bm = bmesh.from_edit_mesh(obj.data)
-        edges = [e for e in bm.edges if e.select]
+        _, edges, _ = get_selected(obj.data, bm, types={'EDGE'})
 
         v_obj = (obj.matrix_world.to_3x3() @ Vector(edges[0].verts[0].co - edges[0].verts[1].co)).normalized() if len(edges) == 1 else None
         mid = get_center_between_verts(*edges[0].verts) if edges else None
 
         bm = bmesh.from_edit_mesh(target.data)
-        edges = [e for e in bm.edges if e.select]
+        _, edges, _ = get_selected(target.data, bm, types={'EDGE'})
 
         v_target = (target.matrix_world.to_3x3() @ Vector(edges[0].verts[0].co - edges[0].verts[1].co)).normalized() if len(edges) == 1 else None
         coords = [target.matrix_world @ v.co for v in edges[0].verts] if edges else None
@@ -341,9 +335,7 @@ class AlignObjectToVert(bpy.types.Operator):
 
             if active and sel:
                 for obj in [active] + sel:
-                    bm = bmesh.from_edit_mesh(obj.data)
-
-                    if len([v for v in bm.verts if v.select]) != 1:
+                    if obj.data.total_vert_sel != 1:
                         return False
                 return True
 
@@ -353,12 +345,12 @@ class AlignObjectToVert(bpy.types.Operator):
 
         mx_target = target.matrix_world
         bm_target = bmesh.from_edit_mesh(target.data)
-        v_target = [v for v in bm_target.verts if v.select][0]
+        v_target = get_selected(target.data, bm_target, types={'VERT'})[0][0]
 
         for obj in objs:
             mx_obj = obj.matrix_world
             bm_obj = bmesh.from_edit_mesh(obj.data)
-            v_obj = [v for v in bm_obj.verts if v.select][0]
+            v_obj = get_selected(obj.data, bm_obj, types={'VERT'})[0][0]
 
             obj.matrix_world = Matrix.Translation(mx_target @ v_target.co - mx_obj @ v_obj.co) @ obj.matrix_world
         return {'FINISHED'}
@@ -373,8 +365,8 @@ class Straighten(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         if context.mode == 'EDIT_MESH':
-            bm = bmesh.from_edit_mesh(context.active_object.data)
-            return len([v for v in bm.verts if v.select]) > 2 and not [f for f in bm.faces if f.select]
+            mesh = context.active_object.data
+            return mesh.total_vert_sel > 2 and not mesh.total_face_sel
 
     def execute(self, context):
         active = context.active_object
@@ -383,7 +375,7 @@ class Straighten(bpy.types.Operator):
         bm.normal_update()
         bm.verts.ensure_lookup_table()
 
-        verts = [v for v in bm.verts if v.select]
+        verts, _, _ = get_selected(active.data, bm, types={'VERT'})
 
         # if in edge mode, check if there are connected vert sequences, that are non-cyclic and have at least 3 verts, then straighten each sequence
         if context.scene.tool_settings.mesh_select_mode[1]:
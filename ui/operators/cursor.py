@@ -9,6 +9,7 @@ from ... utils.registration import get_prefs, get_addon
 from ... utils.draw import add_object_axes_drawing_handler, remove_object_axes_drawing_handler
 from ... utils.tools import get_active_tool
 from ... utils.object import compensate_children
+from ... utils.selection import get_selected
 
 
 cursor = None
@@ -66,8 +67,7 @@ class CursorToSelected(bpy.types.Operator):
     @classmethod
     def poll(cls, context):
         if context.mode == 'EDIT_MESH' and tuple(context.scene.tool_settings.mesh_select_mode) in [(True, False, False), (False, True, False), (False, False, True)]:
-            bm = bmesh.from_edit_mesh(context.active_object.data)
-            return [v for v in bm.verts if v.select]
+            return context.active_object.data.total_vert_sel
         return context.active_object or context.selected_objects
 
     def invoke(self, context, event):
@@ -152,7 +152,7 @@ class CursorToSelected(bpy.types.Operator):
         mx = active.matrix_world
 
         if tuple(bpy.context.scene.tool_settings.mesh_select_mode) == (True, False, False):
-            verts = [v for v in bm.verts if v.select]
+            verts, _, _ = get_selected(active.data, bm, types={'VERT'})
 
             co = average_locations([v.co for v in verts])
 
@@ -163,7 +163,7 @@ class CursorToSelected(bpy.types.Operator):
             rot = create_rotation_matrix_from_vertex(active, v)
 
         elif tuple(bpy.context.scene.tool_settings.mesh_select_mode) == (False, True, False):
-            edges = [e for e in bm.edges if e.select]
+            _, edges, _ = get_selected(active.data, bm, types={'EDGE'})
             center = average_locations([get_center_between_verts(*e.verts) for e in edges])
 
             # create edge world matrix components
@@ -173,7 +173,7 @@ class CursorToSelected(bpy.types.Operator):
             rot = create_rotation_matrix_from_edge(active, e)
 
         elif tuple(bpy.context.scene.tool_settings.mesh_select_mode) == (False, False, True):
-            faces = [f for f in bm.faces if f.select]
+            _, _, faces = get_selected(active.data, bm, types={'FACE'})
 
             center = average_locations([f.calc_center_median_weighted() for f in faces])
 
@@ -5,6 +5,7 @@ from ... utils.math import average_locations
 from ... utils.ui import popup_message
 from ... utils.object import set_obj_origin
 from ... utils.registration import get_addon
+from ... utils.selection import get_selected
 
 
 decalmachine = None
@@ -32,8 +33,7 @@ class OriginToActive(bpy.types.Operator):
                 return [obj for obj in context.selected_objects if obj != active and obj.type not in ['EMPTY', 'FONT']]
 
             elif context.mode == 'EDIT_MESH' and tuple(context.scene.tool_settings.mesh_select_mode) in [(True, False, False), (False, True, False), (False, False, True)]:
-                bm = bmesh.from_edit_mesh(active.data)
-                return [v for v in bm.verts if v.select]
+                return active.data.total_vert_sel
 
     def invoke(self, context, event):
         if event.alt and event.ctrl:
@@ -70,7 +70,7 @@ class OriginToActive(bpy.types.Operator):
         bm.verts.ensure_lookup_table()
 
         if tuple(bpy.context.scene.tool_settings.mesh_select_mode) == (True, False, False):
-            verts = [v for v in bm.verts if v.select]
+            verts, _, _ = get_selected(active.data, bm, types={'VERT'})
             co = average_locations([v.co for v in verts])
 
             # create vertex world matrix components
@@ -80,7 +80,7 @@ class OriginToActive(bpy.types.Operator):
             rot = create_rotation_matrix_from_vertex(active, v)
 
         elif tuple(bpy.context.scene.tool_settings.mesh_select_mode) == (False, True, False):
-            edges = [e for e in bm.edges if e.select]
+            _, edges, _ = get_selected(active.data, bm, types={'EDGE'})
             center = average_locations([get_center_between_verts(*e.verts) for e in edges])
 
             # create edge world matrix components
@@ -90,7 +90,7 @@ class OriginToActive(bpy.types.Operator):
             rot = create_rotation_matrix_from_edge(active, e)
 
         elif tuple(bpy.context.scene.tool_settings.mesh_select_mode) == (False, False, True):
-            faces = [f for f in bm.faces if f.select]
+            _, _, faces = get_selected(active.data, bm, types={'FACE'})
             center = average_locations([f.calc_center_median_weighted() for f in faces])
 
             # create face world matrix components
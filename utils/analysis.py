@@ -0,0 +1,275 @@
+import bmesh
+import numpy as np
+from . graph import build_mesh_graph
+from . mesh import get_mesh_revision
+
+
+# ARRAYS
+
+def get_bmesh_arrays(bm, loops=False):
+    '''
+    return the vert coords and edge vert indices of the bmesh as arrays, and optionally its loop and face data too
+    the loop arrays hold the vert, edge and face index of each loop, in face order, so the loops of a face are consecutive
+    '''
+
+    bm.verts.index_update()
+    bm.edges.index_update()
+    bm.faces.index_update()
+
+    vert_count, edge_count, face_count = len(bm.verts), len(bm.edges), len(bm.faces)
+
+    arrays = {'coords': np.fromiter((c for v in bm.verts for c in v.co), dtype=np.float32, count=vert_count * 3).reshape(-1, 3),
+              'edges': np.fromiter((v.index for e in bm.edges for v in e.verts), dtype=np.int32, count=edge_count * 2).reshape(-1, 2)}
+
+    if loops:
+        face_sizes = np.fromiter((len(f.loops) for f in bm.faces), dtype=np.int32, count=face_count)
+        loop_count = int(face_sizes.sum())
+
+        loop_data = np.fromiter((i for f in bm.faces for l in f.loops for i in (l.vert.index, l.edge.index)), dtype=np.int32, count=loop_count * 2).reshape(-1, 2)
+
+        arrays['face_sizes'] = face_sizes
+        arrays['face_normals'] = np.fromiter((c for f in bm.faces for c in f.normal), dtype=np.float32, count=face_count * 3).reshape(-1, 3)
+        arrays['loop_verts'] = loop_data[:, 0]
+        arrays['loop_edges'] = loop_data[:, 1]
+        arrays['loop_faces'] = np.repeat(np.arange(face_count, dtype=np.int32), face_sizes)
+
+    return arrays
+
+
+def get_angles(vectors1, vectors2):
+    '''
+    return the angles in degrees between two (N, 3) vector arrays, zero length vectors produce nan, which fails every comparison
+    '''
+
+    vectors1 = vectors1.astype(np.float64)
+    vectors2 = vectors2.astype(np.float64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos = np.einsum('ij,ij->i', vectors1, vectors2) / (np.linalg.norm(vectors1, axis=1) * np.linalg.norm(vectors2, axis=1))
+
+    return np.degrees(np.arccos(np.clip(cos, -1, 1)))
+
+
+# REDUNDANT GEOMETRY
+
+def get_redundant_verts(arrays, angle):
+    '''
+    return a vert mask of the two edged verts, whose edges enclose an angle larger than the passed in one, in degrees
+    '''
+
+    coords = arrays['coords']
+    graph = build_mesh_graph(len(coords), arrays['edges'], coords)
+
+    indptr, indices = graph['indptr'], graph['indices']
+
+    two_edged = np.flatnonzero(np.diff(indptr) == 2)
+
+    first = indices[indptr[two_edged]]
+    second = indices[indptr[two_edged] + 1]
+
+    angles = get_angles(coords[first] - coords[two_edged], coords[second] - coords[two_edged])
+
+    mask = np.zeros(len(coords), dtype=bool)
+    mask[two_edged[angles > angle]] = True
+    return mask
+
+
+def get_manifold_edge_faces(arrays):
+    '''
+    return the indices of the manifold edges, which are those with exactly two faces, and the (N, 2) face indices of each of them
+    '''
+
+    loop_edges = arrays['loop_edges']
+
+    face_counts = np.bincount(loop_edges, minlength=len(arrays['edges']))
+    manifold = np.flatnonzero(face_counts == 2)
+
+    # sorting the loops by edge makes the two loops of each manifold edge neighbours
+    order = np.argsort(loop_edges, kind='stable')
+    starts = np.cumsum(face_counts) - face_counts
+
+    loops = order[starts[manifold, None] + np.arange(2)]
+
+    return manifold, arrays['loop_faces'][loops]
+
+
+def get_redundant_edges(arrays, angle):
+    '''
+    return an edge mask of the manifold edges, whose face normals deviate less than 180 - angle degrees, so their faces are practically coplanar
+    '''
+
+    manifold, faces = get_manifold_edge_faces(arrays)
+
+    normals = arrays['face_normals']
+    angles = get_angles(normals[faces[:, 0]], normals[faces[:, 1]])
+
+    mask = np.zeros(len(arrays['edges']), dtype=bool)
+    mask[manifold[angles < 180 - angle]] = True
+    return mask
+
+
+# FACES
+
+face_analyses = {}
+
+
+def analyse_faces(arrays):
+    '''
+    return per face vert counts, planarity errors and manifoldness, as well as the non-manifold edges, in one pass over the loop arrays
+    the planarity error is the largest distance of a face's verts to the plane through its median center, along its normal, tris are always planar
+    '''
+
+    sizes = arrays['face_sizes']
+    loop_faces = arrays['loop_faces']
+
+    starts = np.cumsum(sizes) - sizes
+
+    loop_coords = arrays['coords'][arrays['loop_verts']]
+
+    errors = np.zeros(len(sizes), dtype=np.float32)
+    nonmanifold_faces = np.zeros(len(sizes), dtype=bool)
+
+    if len(loop_coords):
+        centers = np.add.reduceat(loop_coords, starts) / sizes[:, None]
+        distances = np.abs(np.einsum('ij,ij->i', loop_coords - centers[loop_faces], arrays['face_normals'][loop_faces]))
+
+        errors = np.maximum.reduceat(distances, starts)
+        errors[sizes <= 3] = 0
+
+    nonmanifold_edges = np.bincount(arrays['loop_edges'], minlength=len(arrays['edges'])) != 2
+
+    if len(loop_coords):
+        nonmanifold_faces = np.logical_or.reduceat(nonmanifold_edges[arrays['loop_edges']], starts)
+
+    return {'sizes': sizes,
+            'errors': errors,
+            'nonmanifold_faces': nonmanifold_faces,
+            'nonmanifold_edges': nonmanifold_edges}
+
+
+def get_face_analysis(bm, mesh=None, redo=None, signature=None):
+    '''
+    return the face analysis of the bmesh, see analyse_faces()
+    if a mesh is passed in, the analysis is cached per mesh, and only redone if the vert, edge or face counts or the mesh revision change
+    redo: like get_mesh_graph(), the revision of the analysis, that the execution being redone used, which is accepted despite a revision change, as long as the counts and the passed in signature are the same
+    signature: any value describing how the bmesh was produced, for instance the props of the operator, that modified it before the analysis
+    '''
+
+    counts = (len(bm.verts), len(bm.edges), len(bm.faces))
+
+    if mesh:
+        key = mesh.as_pointer()
+        revision = get_mesh_revision(mesh)
+
+        analysis = face_analyses.get(key)
+
+        if analysis and analysis['counts'] == counts and (analysis['revision'] == revision or (redo is not None and analysis['revision'] == redo and analysis['signature'] == signature)):
+            return analysis
+
+    analysis = analyse_faces(get_bmesh_arrays(bm, loops=True))
+
+    if mesh:
+        analysis['counts'] = counts
+        analysis['revision'] = revision
+        analysis['signature'] = signature
+
+        face_analyses[key] = analysis
+
+    return analysis
+
+
+def get_face_mask(analysis, type, threshold=0):
+    '''
+    return the face mask of the passed in type: NON-PLANAR faces, whose planarity error exceeds the threshold, TRIS, NGONS or NON-MANIFOLD faces
+    thresholding is cheap, so changing the threshold only requires this, not a new analysis
+    '''
+
+    if type == 'NON-PLANAR':
+        return analysis['errors'] > threshold
+
+    elif type == 'TRIS':
+        return analysis['sizes'] == 3
+
+    elif type == 'NGONS':
+        return analysis['sizes'] > 4
+
+    elif type == 'NON-MANIFOLD':
+        return analysis['nonmanifold_faces']
+
+
+# ISSUES
+
+mesh_issues = {}
+
+
+def analyse_issues(bm, distance=0.0001, angle=179.999):
+    '''
+    find everything the clean up would act on, without modifying the bmesh, and return it as index arrays
+    doubles are (N, 2) pairs of duplicate and target vert indices, degenerate edges are those not longer than distance, the rest is as in the clean up
+    also holds the face analysis, so non-planar faces can be thresholded from it, see get_face_mask()
+    '''
+
+    bm.normal_update()
+
+    arrays = get_bmesh_arrays(bm, loops=True)
+    analysis = analyse_faces(arrays)
+
+    # find_doubles only finds, the indices are up to date thanks to get_bmesh_arrays()
+    targetmap = bmesh.ops.find_doubles(bm, verts=bm.verts, dist=distance)['targetmap']
+    doubles = np.array([(v.index, target.index) for v, target in targetmap.items()], dtype=np.int32).reshape(-1, 2)
+
+    coords, edges = arrays['coords'], arrays['edges']
+    lengths = np.linalg.norm(coords[edges[:, 0]] - coords[edges[:, 1]], axis=1)
+
+    vert_edge_counts = np.bincount(edges.ravel(), minlength=len(coords))
+    edge_face_counts = np.bincount(arrays['loop_edges'], minlength=len(edges))
+
+    # loose faces are those without a single manifold edge
+    sizes = arrays['face_sizes']
+    loose_faces = np.logical_and.reduceat(analysis['nonmanifold_edges'][arrays['loop_edges']], np.cumsum(sizes) - sizes) if len(sizes) else np.zeros(0, dtype=bool)
+
+    issues = {'doubles': doubles,
+              'degenerate_edges': np.flatnonzero(lengths <= distance),
+              'loose_verts': np.flatnonzero(vert_edge_counts == 0),
+              'loose_edges': np.flatnonzero(edge_face_counts == 0),
+              'loose_faces': np.flatnonzero(loose_faces),
+              'redundant_verts': np.flatnonzero(get_redundant_verts(arrays, angle)),
+              'redundant_edges': np.flatnonzero(get_redundant_edges(arrays, angle)),
+              'nonmanifold_edges': np.flatnonzero(analysis['nonmanifold_edges']),
+              'analysis': analysis}
+
+    return issues
+
+
+def get_cached_mesh_issues(bm, mesh, distance=0.0001, angle=179.999, redo=False):
+    '''
+    return the cached issues of the mesh, if they are still valid for the bmesh and the passed in distance and angle, otherwise None
+    like get_face_analysis(), the cache is validated by the element counts and the mesh revision, or on redo by the counts alone
+    redo must only be used to display the issues, never to act on their indices, as the mesh may have changed since they were found
+    '''
+
+    issues = mesh_issues.get(mesh.as_pointer())
+
+    if issues and issues['counts'] == (len(bm.verts), len(bm.edges), len(bm.faces)) and issues['signature'] == (distance, angle):
+        if issues['revision'] == get_mesh_revision(mesh) or redo:
+            return issues
+
+
+def get_mesh_issues(bm, mesh, distance=0.0001, angle=179.999, redo=False):
+    '''
+    return the issues of the mesh, see analyse_issues(), cached per mesh, so panels and redos can show them without analysing again
+    '''
+
+    issues = get_cached_mesh_issues(bm, mesh, distance=distance, angle=angle, redo=redo)
+
+    if issues:
+        return issues
+
+    issues = analyse_issues(bm, distance=distance, angle=angle)
+
+    issues['counts'] = (len(bm.verts), len(bm.edges), len(bm.faces))
+    issues['revision'] = get_mesh_revision(mesh)
+    issues['signature'] = (distance, angle)
+
+    mesh_issues[mesh.as_pointer()] = issues
+    return issues
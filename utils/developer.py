@@ -54,3 +54,685 @@ def output_traceback(self):
 
     tb = traceback.format_exc() + "\nPLEASE REPORT THIS ERROR to mesh@machin3.io"
     self.report({'ERROR'}, tb)
+
+
+# BENCHMARKS
+
+def legacy_shortest_path(bm, vstart, vend, topo=False):
+    '''
+    the list based dijkstra, that get_shortest_path used before it was moved to a priority queue, kept around as a reference for benchmarking
+    '''
+
+    import sys
+
+    mg = {v: [] for v in bm.verts}
+
+    for e in bm.edges:
+        distance = 1 if topo else e.calc_length()
+
+        mg[e.verts[0]].append((e.verts[1], distance))
+        mg[e.verts[1]].append((e.verts[0], distance))
+
+    d = dict.fromkeys(mg.keys(), sys.maxsize)
+    predecessor = dict.fromkeys(mg.keys())
+
+    d[vstart] = 0
+    unknownverts = [(0, vstart)]
+
+    while unknownverts:
+        dist, vcurrent = unknownverts[0]
+
+        for vother, distance in mg[vcurrent]:
+            if d[vother] > d[vcurrent] + distance:
+                d[vother] = d[vcurrent] + distance
+
+                unknownverts.append((d[vother], vother))
+                predecessor[vother] = vcurrent
+
+        unknownverts.pop(0)
+
+        if topo and vcurrent == vend:
+            break
+
+    path = []
+    endvert = vend
+
+    while endvert is not None:
+        path.append(endvert)
+        endvert = predecessor[endvert]
+
+    seen = set()
+    return [v for v in reversed(path) if not (v in seen or seen.add(v))]
+
+
+def benchmark_shortest_path(counts=(10000, 100000, 1000000), legacy=True):
+    '''
+    compare the legacy and priority queue based shortest path searches on square grids with roughly the passed in vert counts
+    the path is searched between two opposite corners, which is the worst case for the early exit
+    run it from Blender's python console: from MACHIN3tools.utils.developer import benchmark_shortest_path
+    '''
+
+    import bmesh
+    from math import sqrt
+    from . graph import get_shortest_path
+
+    for vert_count in counts:
+        segments = max(int(sqrt(vert_count)) - 1, 1)
+
+        bm = bmesh.new()
+        bmesh.ops.create_grid(bm, x_segments=segments, y_segments=segments, size=1)
+        bm.verts.ensure_lookup_table()
+
+        vstart = bm.verts[0]
+        vend = bm.verts[-1]
+
+        print(f"\n{len(bm.verts)} verts, {len(bm.edges)} edges")
+
+        for topo in [True, False]:
+            print(" TOPO" if topo else " LENGTH")
+
+            timings = {}
+
+            if legacy:
+                start = time.time()
+                reference = legacy_shortest_path(bm, vstart, vend, topo=topo)
+                timings['legacy'] = time.time() - start
+            else:
+                reference = None
+
+            for name, heuristic in [('dijkstra', False), ('astar', True)]:
+                start = time.time()
+                path = get_shortest_path(bm, vstart, vend, topo=topo, heuristic=heuristic)
+                timings[name] = time.time() - start
+
+                if reference is not None and len(path) != len(reference):
+                    print(f"  WARNING: {name} path has {len(path)} verts, legacy path has {len(reference)}")
+
+                elif reference is not None and not heuristic and path != reference:
+                    print(f"  {name} path differs from the legacy path, but has the same length")
+
+            for name, t in timings.items():
+                print(f"  {name}: {t:.6f}" + (f" ({timings['legacy'] / t:.1f}x)" if legacy and name != 'legacy' and t else ""))
+
+        bm.free()
+
+
+def compare_shortest_paths(trials=300, seed=0, bidirectional=False):
+    '''
+    compare the paths of get_shortest_paths() with those of the legacy search, between random vert pairs on randomly sized and distorted grids, in both topo and length mode
+    the paths have to be identical, not just equally long, as SmartVert merges and connects along them
+    bidirectional: compare the bidirectional searches instead, which are only guaranteed to find equally short paths
+    run it from Blender's python console: from MACHIN3tools.utils.developer import compare_shortest_paths
+    '''
+
+    import bmesh
+    import random
+    from . graph import get_mesh_graph, get_shortest_paths
+
+    rnd = random.Random(seed)
+    mismatches = {True: 0, False: 0}
+
+    for trial in range(trials):
+        bm = bmesh.new()
+        bmesh.ops.create_grid(bm, x_segments=rnd.randint(2, 30), y_segments=rnd.randint(2, 30), size=1)
+
+        # distort the grid, so the length mode has to choose between different lengths
+        for v in bm.verts:
+            v.co.x += rnd.uniform(-0.01, 0.01)
+            v.co.y += rnd.uniform(-0.01, 0.01)
+
+        # and remove some verts, so the paths have to go around holes
+        bmesh.ops.delete(bm, geom=rnd.sample(list(bm.verts), len(bm.verts) // 10), context='VERTS')
+
+        bm.verts.ensure_lookup_table()
+        vstart, vend = rnd.sample(list(bm.verts), 2)
+
+        graph = get_mesh_graph(bm)
+
+        for topo in [True, False]:
+            reference = [v.index for v in legacy_shortest_path(bm, vstart, vend, topo=topo)]
+            path = get_shortest_paths(graph, [(vstart.index, vend.index)], topo=topo, bidirectional=bidirectional)[0].tolist()
+
+            if path != reference:
+                mismatches[topo] += 1
+
+        bm.free()
+
+    print(f"TOPO: {trials - mismatches[True]} of {trials} paths identical")
+    print(f"LENGTH: {trials - mismatches[False]} of {trials} paths identical")
+
+    return mismatches
+
+
+def legacy_sort_vert_sequences(verts, get_link_edges):
+    '''
+    the list based vert sequence sorting, that get_selected_vert_sequences used before sort_vert_sequences(), for comparison
+    '''
+
+    sequences = []
+
+    # if edge loops are non-cyclic, it matters at what vert you start the sorting
+    noncyclicstartverts = [v for v in verts if len(get_link_edges(v)) == 1]
+
+    if noncyclicstartverts:
+        v = noncyclicstartverts[0]
+
+    # in cyclic edge loops, any vert works
+    else:
+        v = verts[0]
+
+    seq = []
+
+    while verts:
+        seq.append(v)
+
+        # safty precaution,for EPanel, where people may select intersecting edge loops
+        if v not in verts:
+            break
+
+        else:
+            verts.remove(v)
+
+        if v in noncyclicstartverts:
+            noncyclicstartverts.remove(v)
+
+        nextv = [e.other_vert(v) for e in get_link_edges(v) if e.other_vert(v) not in seq]
+
+        # next vert in sequence
+        if nextv:
+            v = nextv[0]
+
+        # finished a sequence
+        else:
+            # determine cyclicity
+            cyclic = True if len(get_link_edges(v)) == 2 else False
+
+            # store sequence and cyclicity
+            sequences.append((seq, cyclic))
+
+            # start a new sequence, if there are still verts left
+            if verts:
+                if noncyclicstartverts:
+                    v = noncyclicstartverts[0]
+                else:
+                    v = verts[0]
+
+                seq = []
+
+    return sequences
+
+
+def compare_sort_vert_sequences(trials=1000, seed=0):
+    '''
+    compare sort_vert_sequences() with the legacy sorting on random cyclic and non-cyclic loops, some of them branching, with the verts passed in shuffled
+    both the sequences and the verts left in the passed in list have to match
+    run it from Blender's python console: from MACHIN3tools.utils.developer import compare_sort_vert_sequences
+    '''
+
+    import bmesh
+    import random
+    from . selection import sort_vert_sequences
+
+    rnd = random.Random(seed)
+    mismatches = 0
+
+    for trial in range(trials):
+        bm = bmesh.new()
+
+        for _ in range(rnd.randint(1, 4)):
+            loop = [bm.verts.new((rnd.random(), rnd.random(), rnd.random())) for _ in range(rnd.randint(2, 20))]
+
+            for v1, v2 in zip(loop, loop[1:] + loop[:1] if len(loop) > 2 and rnd.random() < 0.5 else loop[1:]):
+                bm.edges.new((v1, v2))
+
+            # occasionally branch off the loop, like intersecting edge loops would
+            if rnd.random() < 0.2:
+                bm.edges.new((rnd.choice(loop), bm.verts.new((rnd.random(), rnd.random(), rnd.random()))))
+
+        bm.verts.index_update()
+
+        edges = set(bm.edges)
+        get_link_edges = lambda v: [e for e in v.link_edges if e in edges]
+
+        verts = list(bm.verts)
+        rnd.shuffle(verts)
+
+        legacy_verts = verts.copy()
+        legacy = legacy_sort_vert_sequences(legacy_verts, get_link_edges)
+        sequences = sort_vert_sequences(verts, get_link_edges)
+
+        if sequences != legacy or verts != legacy_verts:
+            mismatches += 1
+            print(f"trial {trial}: {[([v.index for v in seq], cyclic) for seq, cyclic in sequences]} != {[([v.index for v in seq], cyclic) for seq, cyclic in legacy]}")
+
+        bm.free()
+
+    print(f"{trials - mismatches} of {trials} random topologies sorted identically")
+    return mismatches
+
+
+def legacy_get_coords(mesh, mx=None):
+    '''
+    the float64 and homogeneous coords based get_coords(), for comparison
+    '''
+
+    import numpy as np
+
+    vert_count = len(mesh.vertices)
+
+    coords = np.empty((vert_count, 3), np.float64)
+    mesh.vertices.foreach_get('co', np.reshape(coords, vert_count * 3))
+
+    if mx is not None:
+        coords_4d = np.ones((vert_count, 4), dtype=np.float64)
+        coords_4d[:, :-1] = coords
+
+        coords = np.einsum('ij,aj->ai', mx, coords_4d)[:, :-1]
+
+    return np.float32(coords)
+
+
+def benchmark_get_coords(counts=(1000000, 10000000), repeat=3, legacy=True):
+    '''
+    compare per call time and peak memory of the legacy, the new, and the pooled get_coords(), on meshes of loose verts with the passed in vert counts
+    peak memory is measured via tracemalloc, which numpy reports its array allocations to
+    run it from Blender's python console: from MACHIN3tools.utils.developer import benchmark_get_coords
+    '''
+
+    import bpy
+    import tracemalloc
+    import numpy as np
+    from mathutils import Matrix
+    from . mesh import get_coords
+
+    mx = Matrix.Rotation(0.5, 4, 'Z') @ Matrix.Translation((1, 2, 3))
+
+    variants = [('new', lambda mesh: get_coords(mesh, mx=mx)),
+                ('pooled', lambda mesh: get_coords(mesh, mx=mx, pool=True))]
+
+    if legacy:
+        variants.insert(0, ('legacy', lambda mesh: legacy_get_coords(mesh, mx=mx)))
+
+    for vert_count in counts:
+        mesh = bpy.data.meshes.new(name='benchmark_get_coords')
+        mesh.vertices.add(vert_count)
+        mesh.vertices.foreach_set('co', np.random.random(vert_count * 3).astype(np.float32))
+
+        print(f"\n{vert_count} verts")
+
+        for name, func in variants:
+
+            # warm up, so the pool is already populated
+            func(mesh)
+
+            tracemalloc.start()
+
+            start = time.time()
+
+            for _ in range(repeat):
+                func(mesh)
+
+            t = (time.time() - start) / repeat
+
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f" {name}: {t:.6f}s per call, {peak / 1024 ** 2:.1f} MB peak")
+
+        bpy.data.meshes.remove(mesh, do_unlink=True)
+
+
+def benchmark_join(counts=(1, 10, 100, 1000), subdivisions=3, legacy=True):
+    '''
+    compare the legacy and array based join(), joining the passed in numbers of subdivided cubes into another one
+    run it from Blender's python console: from MACHIN3tools.utils.developer import benchmark_join
+    '''
+
+    import bpy
+    import bmesh
+    from mathutils import Matrix
+    from . mesh import join, bmesh_join
+
+    def create_objects(count):
+        bm = bmesh.new()
+        bmesh.ops.create_cube(bm, size=1)
+        bmesh.ops.subdivide_edges(bm, edges=bm.edges, cuts=subdivisions, use_grid_fill=True)
+
+        objs = []
+
+        for idx in range(count + 1):
+            mesh = bpy.data.meshes.new(name='benchmark_join')
+            bm.to_mesh(mesh)
+
+            obj = bpy.data.objects.new(name='benchmark_join', object_data=mesh)
+            obj.matrix_world = Matrix.Translation((idx * 2, 0, 0))
+            bpy.context.scene.collection.objects.link(obj)
+
+            objs.append(obj)
+
+        bm.free()
+        return objs[0], objs[1:]
+
+    variants = [('legacy', bmesh_join), ('arrays', join)] if legacy else [('arrays', join)]
+
+    for count in counts:
+        print(f"\n{count} objects")
+
+        timings = {}
+
+        for name, func in variants:
+            target, objects = create_objects(count)
+            names = [obj.name for obj in objects]
+
+            start = time.time()
+            func(target, objects, select=[1])
+            timings[name] = time.time() - start
+
+            print(f" {name}: {timings[name]:.6f}s, {len(target.data.polygons)} faces" + (f" ({timings['legacy'] / timings[name]:.1f}x)" if name != 'legacy' and 'legacy' in timings and timings[name] else ""))
+
+            # removing their meshes may have removed the objects already
+            for name in names:
+                if name in bpy.data.objects:
+                    bpy.data.objects.remove(bpy.data.objects[name], do_unlink=True)
+
+            bpy.data.meshes.remove(target.data, do_unlink=True)
+
+
+def benchmark_mesh_ops(counts=(1000000, 4000000)):
+    '''
+    compare the bmesh round trips, that smooth(), flip_normals() and blast() used to do, with their array based versions, on grids with roughly the passed in face counts
+    blast deletes every other face row
+    run it from Blender's python console: from MACHIN3tools.utils.developer import benchmark_mesh_ops
+    '''
+
+    import bpy
+    import bmesh
+    import numpy as np
+    from math import sqrt
+    from . mesh import smooth, flip_normals, blast
+
+    def legacy_smooth(mesh):
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+
+        for f in bm.faces:
+            f.smooth = True
+
+        bm.to_mesh(mesh)
+        bm.free()
+
+    def legacy_flip_normals(mesh):
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+
+        bmesh.ops.reverse_faces(bm, faces=bm.faces)
+        bm.to_mesh(mesh)
+        bm.free()
+
+    def legacy_blast(mesh):
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+
+        bmesh.ops.delete(bm, geom=[f for f in bm.faces if f.select], context='FACES')
+        bm.to_mesh(mesh)
+        bm.free()
+
+    ops = [('smooth', legacy_smooth, smooth),
+           ('flip', legacy_flip_normals, flip_normals),
+           ('blast', legacy_blast, lambda mesh: blast(mesh, 'selected', 'FACES'))]
+
+    for face_count in counts:
+        segments = max(int(sqrt(face_count)), 1)
+
+        bm = bmesh.new()
+        bmesh.ops.create_grid(bm, x_segments=segments + 1, y_segments=segments + 1, size=1)
+
+        print(f"\n{len(bm.faces)} faces")
+
+        for name, legacy, func in ops:
+            timings = []
+
+            for op in [legacy, func]:
+                mesh = bpy.data.meshes.new(name='benchmark_mesh_ops')
+                bm.to_mesh(mesh)
+
+                select = np.zeros(len(mesh.polygons), dtype=bool)
+                select.reshape(segments, segments)[::2] = True
+                mesh.polygons.foreach_set('select', select)
+
+                start = time.time()
+                op(mesh)
+                timings.append(time.time() - start)
+
+                bpy.data.meshes.remove(mesh, do_unlink=True)
+
+            print(f" {name}: legacy {timings[0]:.6f}s, arrays {timings[1]:.6f}s" + (f" ({timings[0] / timings[1]:.1f}x)" if timings[1] else ""))
+
+        bm.free()
+
+
+def legacy_calculate_thread(segments=12, loops=2, radius=1, depth=0.1, h1=0.2, h2=0.0, h3=0.2, h4=0.0, fade=0.15):
+    '''
+    the Vector based calculate_thread(), for comparison
+    '''
+
+    from math import cos, sin, pi
+    from mathutils import Vector
+
+    height = h1 + h2 + h3 + h4
+
+    # fade determines how many of the segments falloff
+    falloff = segments * fade
+
+    # create profile coords, there are 3-5 coords, depending on the h2 and h4 "spacer values"
+    profile = [Vector((radius, 0, 0))]
+    profile.append(Vector((radius + depth, 0, h1)))
+
+    if h2 > 0:
+        profile.append(Vector((radius + depth, 0, h1 + h2)))
+
+    profile.append(Vector((radius, 0, h1 + h2 + h3)))
+
+    if h4 > 0:
+        profile.append(Vector((radius, 0, h1 + h2 + h3 + h4)))
+
+    # based on the profile create the thread coords and indices
+    pcount = len(profile)
+
+    coords = []
+    indices = []
+
+    bottom_coords = []
+    bottom_indices = []
+
+    top_coords = []
+    top_indices = []
+
+    for loop in range(loops):
+        for segment in range(segments + 1):
+            angle = segment * 2 * pi / segments
+
+            # create the thread coords
+            for pidx, co in enumerate(profile):
+
+                # the radius for individual points is always the x coord, except when adjusting the falloff for the first or last segments
+                if loop == 0 and segment <= falloff and pidx in ([1, 2] if h2 else [1]):
+                    r = radius + depth * segment / falloff
+                elif loop == loops - 1 and segments - segment <= falloff and pidx in ([1, 2] if h2 else [1]):
+                    r = radius + depth * (segments - segment) / falloff
+                else:
+                    r = co.x
+
+                # slightly increase each profile coords height per segment, and offset it per loop too
+                z = co.z + (segment / segments) * height + (height * loop)
+
+                # add thread coords
+                coords.append(Vector((r * cos(angle), r * sin(angle), z)))
+
+                # add bottom coords, to close off the thread faces into a full cylinder
+                if loop == 0 and pidx == 0:
+
+                    # the last segment, has coords for all the verts of the profile!
+                    if segment == segments:
+                        bottom_coords.extend([Vector((radius, 0, co.z)) for co in profile])
+
+                    # every other segment has a point at z == 0 and the first point in the profile
+                    else:
+                        bottom_coords.extend([Vector((r * cos(angle), r * sin(angle), 0)), Vector((r * cos(angle), r * sin(angle), z))])
+
+                elif loop == loops - 1 and pidx == len(profile) - 1:
+
+                    # the first segment, has coords for all the verts of the profile!
+                    if segment == 0:
+                        top_coords.extend([Vector((radius, 0, co.z + height + height * loop)) for co in profile])
+
+                    # every other segment has a point at max height and the last point in the profile
+                    else:
+                        # top_coords.extend([Vector((r * cos(angle), r * sin(angle), 2 * height + height * loop)), Vector((r * cos(angle), r * sin(angle), z))])
+                        top_coords.extend([Vector((r * cos(angle), r * sin(angle), z)), Vector((r * cos(angle), r * sin(angle), 2 * height + height * loop))])
+
+
+            # for each segment - starting with the second one - create the face indices
+            if segment > 0:
+
+                # create thread face indices, pcount - 1 rows of them
+                for p in range(pcount - 1):
+                    indices.append([len(coords) + i + p for i in [-pcount * 2, -pcount, -pcount + 1, -pcount * 2 + 1]])
+
+                # create bottom face indices
+                if loop == 0:
+                    if segment < segments:
+                        bottom_indices.append([len(bottom_coords) + i for i in [-4, -2, -1, -3]])
+
+                    # the last face will have 5-7 verts, depending on h2 and h4
+                    else:
+                        bottom_indices.append([len(bottom_coords) + i for i in [-1 - pcount, -2 - pcount] + [i - pcount for i in range(pcount)]])
+
+                # create bottom face indices
+                if loop == loops - 1:
+                    # the first face will have 5-7 verts, depending on h2 and h4
+                    if segment == 1:
+                        top_indices.append([len(top_coords) + i for i in [-2, -1] + [-3 - i for i in range(pcount)]])
+                    else:
+                        top_indices.append([len(top_coords) + i for i in [-4, -2, -1, -3]])
+
+    return (coords, indices), (bottom_coords, bottom_indices), (top_coords, top_indices), height + height * loops
+
+
+def legacy_build_faces(bm, thread, bottom, top, smooth=False):
+    '''
+    the per vert and per face build_faces() of the Thread operator, for comparison
+    '''
+
+    verts = []
+
+    for co in thread[0]:
+        v = bm.verts.new(co)
+        verts.append(v)
+
+    faces = []
+
+    for ids in thread[1]:
+        f = bm.faces.new([verts[idx] for idx in ids])
+        f.smooth = smooth
+        faces.append(f)
+
+        if smooth:
+            f.edges[0].smooth = False
+            f.edges[-2].smooth = False
+
+    bottom_verts = []
+
+    for co in bottom[0]:
+        v = bm.verts.new(co)
+        bottom_verts.append(v)
+
+    bottom_faces = []
+
+    for ids in bottom[1]:
+        f = bm.faces.new([bottom_verts[idx] for idx in ids])
+        f.smooth = smooth
+        bottom_faces.append(f)
+
+        if smooth:
+            if len(ids) == 4:
+                f.edges[-2].smooth = False
+                f.edges[0].smooth = False
+            else:
+                f.edges[-1].smooth = False
+                f.edges[1].smooth = False
+
+
+    top_verts = []
+
+    for co in top[0]:
+        v = bm.verts.new(co)
+        top_verts.append(v)
+
+    top_faces = []
+
+    for ids in top[1]:
+        f = bm.faces.new([top_verts[idx] for idx in ids])
+        f.smooth = smooth
+        top_faces.append(f)
+
+        if smooth:
+            if len(ids) == 4:
+                f.edges[-2].smooth = False
+                f.edges[0].smooth = False
+            else:
+                f.edges[-1].smooth = False
+                f.edges[1].smooth = False
+
+    return [v for v in verts + bottom_verts + top_verts if v.is_valid], faces + bottom_faces + top_faces
+
+
+def benchmark_thread(segments=(32, 64, 128, 256, 512), loops=(1, 10, 100), legacy=True):
+    '''
+    compare the legacy and array based thread generation and face creation, for all combinations of the passed in segment and loop counts
+    run it from Blender's python console: from MACHIN3tools.utils.developer import benchmark_thread
+    '''
+
+    import bmesh
+    from . geometry import calculate_thread, get_thread_faces
+    from . mesh import add_faces
+
+    for segment_count in segments:
+        for loop_count in loops:
+            print(f"\n{segment_count} segments, {loop_count} loops")
+
+            timings = {}
+
+            if legacy:
+                bm = bmesh.new()
+
+                start = time.time()
+                thread, bottom, top, _ = legacy_calculate_thread(segments=segment_count, loops=loop_count)
+                timings['legacy calculate'] = time.time() - start
+
+                start = time.time()
+                legacy_build_faces(bm, thread, bottom, top, smooth=True)
+                timings['legacy build'] = time.time() - start
+
+                bm.free()
+
+            bm = bmesh.new()
+
+            start = time.time()
+            thread, bottom, top, _ = calculate_thread(segments=segment_count, loops=loop_count)
+            timings['calculate'] = time.time() - start
+
+            start = time.time()
+            coords, indices, sizes, sharp = get_thread_faces(thread, bottom, top)
+            add_faces(bm, coords, indices, sizes, smooth=True, sharp=sharp)
+            timings['build'] = time.time() - start
+
+            print(f" {len(bm.verts)} verts, {len(bm.faces)} faces")
+
+            bm.free()
+
+            for name in ['calculate', 'build']:
+                if legacy:
+                    print(f" {name}: legacy {timings['legacy ' + name]:.6f}s, arrays {timings[name]:.6f}s" + (f" ({timings['legacy ' + name] / timings[name]:.1f}x)" if timings[name] else ""))
+                else:
+                    print(f" {name}: arrays {timings[name]:.6f}s")
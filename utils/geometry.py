@@ -1,5 +1,5 @@
-from math import cos, sin, pi
-from mathutils import Vector
+from math import pi
+import numpy as np
 
 
 def calculate_thread(segments=12, loops=2, radius=1, depth=0.1, h1=0.2, h2=0.0, h3=0.2, h4=0.0, fade=0.15):
@@ -11,7 +11,8 @@ def calculate_thread(segments=12, loops=2, radius=1, depth=0.1, h1=0.2, h2=0.0,
     #  |  h2
     #  /  h1
     also ceate coordinates and indices for faces at the bottom and top of the thread, creating a full cylinder
-    return coords and indices tuples for thread, bottom and top faces, as well as the total height of the thread
+    return (coords, indices, sizes) tuples for thread, bottom and top faces, as well as the total height of the thread
+    coords are (N, 3) arrays, indices are the flat vert indices of all faces, and sizes the vert counts of the faces
     '''
 
     height = h1 + h2 + h3 + h4
@@ -20,95 +21,108 @@ def calculate_thread(segments=12, loops=2, radius=1, depth=0.1, h1=0.2, h2=0.0,
     falloff = segments * fade
 
     # create profile coords, there are 3-5 coords, depending on the h2 and h4 "spacer values"
-    profile = [Vector((radius, 0, 0))]
-    profile.append(Vector((radius + depth, 0, h1)))
+    profile = [(radius, 0), (radius + depth, h1)]
 
     if h2 > 0:
-        profile.append(Vector((radius + depth, 0, h1 + h2)))
+        profile.append((radius + depth, h1 + h2))
 
-    profile.append(Vector((radius, 0, h1 + h2 + h3)))
+    profile.append((radius, h1 + h2 + h3))
 
     if h4 > 0:
-        profile.append(Vector((radius, 0, h1 + h2 + h3 + h4)))
+        profile.append((radius, h1 + h2 + h3 + h4))
 
-    # based on the profile create the thread coords and indices
+    profile = np.array(profile, dtype=np.float64)
+
+    # based on the profile create the thread coords and indices, which are ordered by loop, segment and profile point
     pcount = len(profile)
 
-    coords = []
-    indices = []
+    segment_idxs = np.arange(segments + 1)
+    angles = segment_idxs * 2 * pi / segments
+
+    cos = np.cos(angles)[np.newaxis, :, np.newaxis]
+    sin = np.sin(angles)[np.newaxis, :, np.newaxis]
+
+    # the radius for individual points is always the x coord, except when adjusting the falloff for the first or last segments
+    radii = np.tile(profile[:, 0], (loops, segments + 1, 1))
+
+    fading = np.zeros(pcount, dtype=bool)
+    fading[[1, 2] if h2 else [1]] = True
+
+    # the first loop's falloff takes precedence, if there is only a single loop
+    last = (segments - segment_idxs <= falloff)[:, np.newaxis] & fading
+    radii[-1] = np.where(last, (radius + depth * (segments - segment_idxs) / falloff)[:, np.newaxis], radii[-1])
+
+    first = (segment_idxs <= falloff)[:, np.newaxis] & fading
+    radii[0] = np.where(first, (radius + depth * segment_idxs / falloff)[:, np.newaxis], radii[0])
 
-    bottom_coords = []
-    bottom_indices = []
+    # slightly increase each profile coords height per segment, and offset it per loop too
+    z = profile[:, 1] + (segment_idxs / segments * height)[:, np.newaxis] + (height * np.arange(loops))[:, np.newaxis, np.newaxis]
 
-    top_coords = []
-    top_indices = []
+    coords = np.stack((radii * cos, radii * sin, z), axis=-1)
 
-    for loop in range(loops):
-        for segment in range(segments + 1):
-            angle = segment * 2 * pi / segments
+    # create thread face indices, for each segment - starting with the second one - pcount - 1 rows of them
+    current = ((np.arange(loops)[:, np.newaxis] * (segments + 1) + np.arange(1, segments + 1)) * pcount)[..., np.newaxis] + np.arange(pcount - 1)
+    previous = current - pcount
 
-            # create the thread coords
-            for pidx, co in enumerate(profile):
+    indices = np.stack((previous, current, current + 1, previous + 1), axis=-1).ravel()
 
-                # the radius for individual points is always the x coord, except when adjusting the falloff for the first or last segments
-                if loop == 0 and segment <= falloff and pidx in ([1, 2] if h2 else [1]):
-                    r = radius + depth * segment / falloff
-                elif loop == loops - 1 and segments - segment <= falloff and pidx in ([1, 2] if h2 else [1]):
-                    r = radius + depth * (segments - segment) / falloff
-                else:
-                    r = co.x
+    # add bottom coords, to close off the thread faces into a full cylinder
+    # every segment but the last has a point at z == 0 and the first point in the profile, the last segment has coords for all the verts of the profile!
+    firsts = coords[0, :-1, 0]
 
-                # slightly increase each profile coords height per segment, and offset it per loop too
-                z = co.z + (segment / segments) * height + (height * loop)
+    floor = firsts.copy()
+    floor[:, 2] = 0
 
-                # add thread coords
-                coords.append(Vector((r * cos(angle), r * sin(angle), z)))
+    bottom_coords = np.concatenate((np.stack((floor, firsts), axis=1).reshape(-1, 3),
+                                    np.column_stack((np.full(pcount, radius), np.zeros(pcount), profile[:, 1]))))
 
-                # add bottom coords, to close off the thread faces into a full cylinder
-                if loop == 0 and pidx == 0:
+    # create bottom face indices, the last face will have 5-7 verts, depending on h2 and h4
+    previous = np.arange(segments - 1) * 2
 
-                    # the last segment, has coords for all the verts of the profile!
-                    if segment == segments:
-                        bottom_coords.extend([Vector((radius, 0, co.z)) for co in profile])
+    bottom_indices = np.concatenate((np.column_stack((previous, previous + 2, previous + 3, previous + 1)).ravel(),
+                                     [segments * 2 - 1, segments * 2 - 2], np.arange(pcount) + segments * 2))
 
-                    # every other segment has a point at z == 0 and the first point in the profile
-                    else:
-                        bottom_coords.extend([Vector((r * cos(angle), r * sin(angle), 0)), Vector((r * cos(angle), r * sin(angle), z))])
+    # add top coords, the first segment has coords for all the verts of the profile!
+    # every other segment has the last point in the profile and a point at max height
+    lasts = coords[-1, 1:, -1]
 
-                elif loop == loops - 1 and pidx == len(profile) - 1:
+    ceiling = lasts.copy()
+    ceiling[:, 2] = 2 * height + height * (loops - 1)
 
-                    # the first segment, has coords for all the verts of the profile!
-                    if segment == 0:
-                        top_coords.extend([Vector((radius, 0, co.z + height + height * loop)) for co in profile])
+    top_coords = np.concatenate((np.column_stack((np.full(pcount, radius), np.zeros(pcount), profile[:, 1] + height + height * (loops - 1))),
+                                 np.stack((lasts, ceiling), axis=1).reshape(-1, 3)))
 
-                    # every other segment has a point at max height and the last point in the profile
-                    else:
-                        # top_coords.extend([Vector((r * cos(angle), r * sin(angle), 2 * height + height * loop)), Vector((r * cos(angle), r * sin(angle), z))])
-                        top_coords.extend([Vector((r * cos(angle), r * sin(angle), z)), Vector((r * cos(angle), r * sin(angle), 2 * height + height * loop))])
+    # create top face indices, the first face will have 5-7 verts, depending on h2 and h4
+    previous = np.arange(segments - 1) * 2 + pcount
 
+    top_indices = np.concatenate(([pcount, pcount + 1], np.arange(pcount)[::-1],
+                                  np.column_stack((previous, previous + 2, previous + 3, previous + 1)).ravel()))
+
+    thread = (coords.reshape(-1, 3), indices, np.full(loops * segments * (pcount - 1), 4))
+    bottom = (bottom_coords, bottom_indices, np.array([4] * (segments - 1) + [pcount + 2]))
+    top = (top_coords, top_indices, np.array([pcount + 2] + [4] * (segments - 1)))
+
+    return thread, bottom, top, height + height * loops
+
+
+def get_thread_faces(thread, bottom, top):
+    '''
+    combine the thread, bottom and top faces of calculate_thread() into single coords, indices and sizes arrays
+    also return the loop indices of the edges, that are sharp on smooth threads, which are those along the thread, and those of the bottom and top faces along the thread's ends
+    these are the first and third edge of each quad, and the second and last edge of each ngon
+    '''
 
-            # for each segment - starting with the second one - create the face indices
-            if segment > 0:
+    parts = [thread, bottom, top]
 
-                # create thread face indices, pcount - 1 rows of them
-                for p in range(pcount - 1):
-                    indices.append([len(coords) + i + p for i in [-pcount * 2, -pcount, -pcount + 1, -pcount * 2 + 1]])
+    offsets = np.cumsum([0] + [len(coords) for coords, _, _ in parts[:-1]])
 
-                # create bottom face indices
-                if loop == 0:
-                    if segment < segments:
-                        bottom_indices.append([len(bottom_coords) + i for i in [-4, -2, -1, -3]])
+    coords = np.concatenate([coords for coords, _, _ in parts])
+    indices = np.concatenate([indices + offset for (_, indices, _), offset in zip(parts, offsets)])
+    sizes = np.concatenate([sizes for _, _, sizes in parts])
 
-                    # the last face will have 5-7 verts, depending on h2 and h4
-                    else:
-                        bottom_indices.append([len(bottom_coords) + i for i in [-1 - pcount, -2 - pcount] + [i - pcount for i in range(pcount)]])
+    starts = np.cumsum(sizes) - sizes
+    quads = sizes == 4
 
-                # create bottom face indices
-                if loop == loops - 1:
-                    # the first face will have 5-7 verts, depending on h2 and h4
-                    if segment == 1:
-                        top_indices.append([len(top_coords) + i for i in [-2, -1] + [-3 - i for i in range(pcount)]])
-                    else:
-                        top_indices.append([len(top_coords) + i for i in [-4, -2, -1, -3]])
+    sharp = np.sort(np.concatenate((starts[quads], starts[quads] + 2, starts[~quads] + 1, starts[~quads] + sizes[~quads] - 1)))
 
-    return (coords, indices), (bottom_coords, bottom_indices), (top_coords, top_indices), height + height * loops
+    return coords, indices, sizes, sharp
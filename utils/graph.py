@@ -1,93 +1,339 @@
-import sys
+from heapq import heappush, heappop
+from math import inf
+from itertools import count
+import numpy as np
+from . mesh import get_mesh_revision
 
 
-def build_mesh_graph(verts, edges, topo=True):
-    mg = {}
-    for v in verts:
-        mg[v] = []
+mesh_graphs = {}
 
-    for e in edges:
-        distance = 1 if topo else e.calc_length()
 
-        mg[e.verts[0]].append((e.verts[1], distance))
-        mg[e.verts[1]].append((e.verts[0], distance))
+def build_mesh_graph(vert_count, edges, coords):
+    '''
+    build a compressed sparse row adjacency from an (E, 2) edge vert index array and (V, 3) vert coords
+    the neighbours of vert v are indices[indptr[v]:indptr[v + 1]], reached via edges of lengths[indptr[v]:indptr[v + 1]]
+    neighbours are stored in edge order, just like the dict of lists this replaces
+    '''
 
-    return mg
+    edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
 
+    lengths = np.linalg.norm(coords[edges[:, 0]] - coords[edges[:, 1]], axis=1).astype(np.float32)
 
-def get_shortest_path(bm, vstart, vend, topo=False, select=False):
-    """
-    author: "G Bantle, Bagration, MACHIN3",
-    source: "https://blenderartists.org/forum/showthread.php?58564-Path-Select-script(Update-20060307-Ported-to-C-now-in-CVS",
-    video: https://www.youtube.com/watch?v=_lHSawdgXpI
-    """
+    # interleave both directions of each edge, a stable sort then keeps each vert's neighbours in edge order
+    src = edges.ravel()
+    dst = edges[:, ::-1].ravel()
+
+    order = np.argsort(src, kind='stable')
+
+    indptr = np.zeros(vert_count + 1, dtype=np.int32)
+    np.cumsum(np.bincount(src, minlength=vert_count), out=indptr[1:])
+
+    return {'indptr': indptr,
+            'indices': dst[order],
+            'lengths': np.repeat(lengths, 2)[order],
+            'coords': coords}
+
+
+def get_mesh_graph(bm=None, mesh=None, redo=None):
+    '''
+    return the adjacency of the bmesh, or of the mesh, if no bmesh is passed in
+    if a mesh is passed in, the graph is cached per mesh, and only rebuilt if the vert, edge or face counts or the mesh revision change
+    redo: the revision of the graph, that the execution being redone used, the redo panel undoes that execution, so this graph is still valid, despite the revision having changed since
+    any other cached graph is still only accepted at the current revision
+    '''
+
+    if bm:
+        bm.verts.index_update()
+        counts = (len(bm.verts), len(bm.edges), len(bm.faces))
+    else:
+        counts = (len(mesh.vertices), len(mesh.edges), len(mesh.polygons))
+
+    if mesh:
+        key = mesh.as_pointer()
+        revision = get_mesh_revision(mesh)
+
+        graph = mesh_graphs.get(key)
+
+        if graph and graph['counts'] == counts and (graph['revision'] == revision or (redo is not None and graph['revision'] == redo)):
+            return graph
+
+    vert_count, edge_count, _ = counts
+
+    if bm:
+        edges = np.fromiter((v.index for e in bm.edges for v in e.verts), dtype=np.int32, count=edge_count * 2)
+        coords = np.fromiter((c for v in bm.verts for c in v.co), dtype=np.float32, count=vert_count * 3)
+
+    else:
+        edges = np.empty(edge_count * 2, dtype=np.int32)
+        mesh.edges.foreach_get('vertices', edges)
+
+        coords = np.empty(vert_count * 3, dtype=np.float32)
+        mesh.vertices.foreach_get('co', coords)
+
+    graph = build_mesh_graph(vert_count, edges, coords)
+
+    if mesh:
+        graph['counts'] = counts
+        graph['revision'] = revision
+
+        # move it to the end, and only keep the most recently used meshes around
+        mesh_graphs.pop(key, None)
+        mesh_graphs[key] = graph
+
+        while len(mesh_graphs) > 8:
+            mesh_graphs.pop(next(iter(mesh_graphs)))
 
-    def dijkstra(mg, vstart, vend, topo=True):
-        # initiate dict to collect distances from stat vert to every other vert
-        d = dict.fromkeys(mg.keys(), sys.maxsize)
+    return graph
 
-        # predecessor dict to track the path walked
-        predecessor = dict.fromkeys(mg.keys())
 
-        # the distance of the start vert to itself is 0
-        d[vstart] = 0
+def dijkstra(graph, start, end, topo=True):
+    '''
+    priority queue based dijkstra on vert indices, exits as soon as the end vert is settled, in both topo and geometric mode
+    end can also be a list of vert indices, in which case the search exits once all of them are settled
+    ties are broken in order of discovery, so in topo mode the predecessors are exactly those of a breadth first search
+    '''
 
-        # keep track of what verts are seen and add the the accumulated distances to those verts
-        unknownverts = [(0, vstart)]
+    targets = set(end) if isinstance(end, (list, tuple, set)) else {end}
 
-        # with topo you can exit as soon as you hit the vend, without topo you can't, because the shorter distance my involve more vert hops
-        # while (topo and vstart != vend) or (not topo and unknownverts):
-        while unknownverts:
-            # sorting actually doesn't seem to  be required, but it was in the original source
-            # I question why the list needs to be sorted by index at all. also, doing it via the lambda function is very slow for some reason
-            # unknownverts.sort(key=lambda x: x[1].index)
+    # memoryviews give fast python level access to the arrays, without converting them to lists first
+    indptr = memoryview(graph['indptr'])
+    indices = memoryview(graph['indices'])
+    lengths = memoryview(graph['lengths'])
 
-            # get the next vert that is closest to vstart
-            dist, vcurrent = unknownverts[0]
+    # only the explored part of the mesh is ever touched, so distances and predecessors are kept in dicts
+    d = {start: 0}
+    predecessor = {start: None}
 
-            # use the mesh graph to retrieve the other verts connected
-            others = mg[vcurrent]
+    # the order counter is used as the tie breaker in the heap, which keeps it fifo for equal distances
+    order = count()
+    heap = [(0, next(order), start)]
 
-            # choose the next vert with the shortest accumulated distance
-            for vother, distance in others:
-                if d[vother] > d[vcurrent] + distance:
-                    d[vother] = d[vcurrent] + distance
+    settled = set()
 
-                    unknownverts.append((d[vother], vother))
-                    predecessor[vother] = vcurrent
+    while heap:
+        dist, _, current = heappop(heap)
 
-            # we've finished exploring this vert, pop it
-            unknownverts.pop(0)
+        # skip outdated heap entries, a shorter distance to this vert has been found since it was pushed
+        if current in settled:
+            continue
 
-            # you can break out early when determening the topological distances
-            if topo and vcurrent == vend:
+        settled.add(current)
+
+        # the shortest distance to the end vert is known once it's popped, no matter if topo or not
+        if current in targets:
+            targets.remove(current)
+
+            if not targets:
                 break
 
-        # backtrace from the end vertex using the predecessor dict
-        path = []
-        endvert = vend
+        for idx in range(indptr[current], indptr[current + 1]):
+            other = indices[idx]
+            distance = dist + (1 if topo else lengths[idx])
+
+            if distance < d.get(other, inf):
+                d[other] = distance
+                predecessor[other] = current
+
+                heappush(heap, (distance, next(order), other))
+
+    return predecessor
+
+
+def astar(graph, start, end, topo=True):
+    '''
+    A* variant of the dijkstra above, using the euclidean distance to the end vert as the heuristic
+    in topo mode the distance is expressed in hops of the longest edge, which keeps the heuristic admissible
+    the path length is guaranteed to be the shortest, but among several equally short paths, a different one than dijkstra's may be chosen
+    '''
+
+    scale = 1
+
+    if topo:
+        maxlength = float(graph['lengths'].max()) if len(graph['lengths']) else 0
+
+        # a graph with only zero length edges can't be estimated
+        if not maxlength:
+            return dijkstra(graph, start, end, topo=topo)
+
+        scale = 1 / maxlength
+
+    indptr = memoryview(graph['indptr'])
+    indices = memoryview(graph['indices'])
+    lengths = memoryview(graph['lengths'])
+    coords = memoryview(graph['coords'].ravel())
+
+    ex, ey, ez = coords[end * 3:end * 3 + 3]
+
+    def heuristic(v):
+        x, y, z = coords[v * 3:v * 3 + 3]
+        return ((ex - x) ** 2 + (ey - y) ** 2 + (ez - z) ** 2) ** 0.5 * scale
+
+    d = {start: 0}
+    predecessor = {start: None}
+
+    order = count()
+    heap = [(heuristic(start), next(order), start)]
+
+    settled = set()
+
+    while heap:
+        _, _, current = heappop(heap)
+
+        if current in settled:
+            continue
+
+        settled.add(current)
+
+        if current == end:
+            break
+
+        dist = d[current]
 
-        while endvert is not None:
-            path.append(endvert)
-            endvert = predecessor[endvert]
+        for idx in range(indptr[current], indptr[current + 1]):
+            other = indices[idx]
 
-        return reversed(path)
+            if other in settled:
+                continue
 
-    def f7(seq):
-        seen = set()
-        seen_add = seen.add
-        return [x for x in seq if not (x in seen or seen_add(x))]
+            distance = dist + (1 if topo else lengths[idx])
 
-    verts = [v for v in bm.verts]
-    edges = [e for e in bm.edges]
+            if distance < d.get(other, inf):
+                d[other] = distance
+                predecessor[other] = current
+
+                heappush(heap, (distance + heuristic(other), next(order), other))
+
+    return predecessor
+
+
+def bidirectional_dijkstra(graph, start, end, topo=True):
+    '''
+    search from both ends at the same time, always expanding the side with the closer frontier, and stop once the frontiers can't produce a shorter connection
+    on meshes, each side only has to explore a disk of about half the path length, so this touches roughly half the verts of a single sided search
+    returns the path as a list of vert indices
+    '''
+
+    if start == end:
+        return [start]
+
+    indptr = memoryview(graph['indptr'])
+    indices = memoryview(graph['indices'])
+    lengths = memoryview(graph['lengths'])
+
+    # forward and backward side
+    d = ({start: 0}, {end: 0})
+    predecessor = ({start: None}, {end: None})
+    settled = (set(), set())
+
+    order = count()
+    heaps = ([(0, next(order), start)], [(0, next(order), end)])
+
+    # length of the shortest connection found so far, and the edge that connects both sides
+    best = inf
+    connection = None
+
+    while heaps[0] and heaps[1]:
+
+        # the frontiers are too far apart to improve the connection
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+
+        dist, _, current = heappop(heaps[side])
+
+        if current in settled[side]:
+            continue
+
+        settled[side].add(current)
+
+        for idx in range(indptr[current], indptr[current + 1]):
+            other = indices[idx]
+            distance = dist + (1 if topo else lengths[idx])
+
+            if distance < d[side].get(other, inf):
+                d[side][other] = distance
+                predecessor[side][other] = current
+
+                heappush(heaps[side], (distance, next(order), other))
+
+            # check if the other side has reached this vert already
+            if other in d[1 - side] and distance + d[1 - side][other] < best:
+                best = distance + d[1 - side][other]
+                connection = (current, other) if side == 0 else (other, current)
+
+    # the end vert can't be reached
+    if not connection:
+        return [end]
+
+    first, second = connection
+
+    return get_path(predecessor[0], first) + get_path(predecessor[1], second)[::-1]
+
+
+def get_path(predecessor, end):
+    '''
+    backtrace the path of vert indices leading to the end vert, from the predecessor dict of a search
+    an unreachable end vert produces a path of just itself
+    '''
+
+    path = []
+
+    while end is not None:
+        path.append(end)
+        end = predecessor.get(end)
+
+    return path[::-1]
+
+
+def get_shortest_paths(graph, pairs, topo=True, bidirectional=False):
+    '''
+    solve several (start, end) vert index pairs on the same graph, and return the paths as vert index arrays in the order of the pairs
+    pairs sharing the same start vert are answered by a single search
+    bidirectional: answer the other pairs by bidirectional searches, which are faster, but in topo mode frequently choose a different one among several equally short paths
+    without it, the paths are exactly those of the legacy search, see utils.developer.compare_shortest_paths()
+    '''
+
+    starts = {}
+
+    for idx, (start, _) in enumerate(pairs):
+        starts.setdefault(start, []).append(idx)
+
+    paths = [None] * len(pairs)
+
+    for start, idxs in starts.items():
+        if bidirectional and len(idxs) == 1:
+            idx = idxs[0]
+            paths[idx] = np.array(bidirectional_dijkstra(graph, start, pairs[idx][1], topo), dtype=np.int32)
+
+        else:
+            predecessor = dijkstra(graph, start, [pairs[idx][1] for idx in idxs], topo)
+
+            for idx in idxs:
+                paths[idx] = np.array(get_path(predecessor, pairs[idx][1]), dtype=np.int32)
+
+    return paths
+
+
+def get_shortest_path(bm, vstart, vend, topo=False, select=False, heuristic=False, mesh=None, redo=None):
+    """
+    author: "G Bantle, Bagration, MACHIN3",
+    source: "https://blenderartists.org/forum/showthread.php?58564-Path-Select-script(Update-20060307-Ported-to-C-now-in-CVS",
+    video: https://www.youtube.com/watch?v=_lHSawdgXpI
+
+    heuristic: use A* instead of dijkstra, faster on large meshes, but may choose a different path among equally short ones
+    mesh: pass in the bmesh's mesh to cache the graph between calls, see get_mesh_graph()
+    """
 
-    mg = build_mesh_graph(verts, edges, topo)
+    graph = get_mesh_graph(bm, mesh=mesh, redo=redo)
 
-    # vert list, shortest dist from vstart to vend
-    path = dijkstra(mg, vstart, vend, topo)
+    # shortest dist from vstart to every vert explored on the way to vend
+    predecessor = astar(graph, vstart.index, vend.index, topo) if heuristic else dijkstra(graph, vstart.index, vend.index, topo)
 
-    # remove duplicates, keeps order, see https://stackoverflow.com/a/480227
-    path = f7(path)
+    # backtrace from the end vertex using the predecessor dict
+    bm.verts.ensure_lookup_table()
+    path = [bm.verts[idx] for idx in get_path(predecessor, vend.index)]
 
     # optionally select the path
     if select:
@@ -1,4 +1,5 @@
 from mathutils import Matrix, Vector
+import numpy as np
 
 
 def get_center_between_points(point1, point2, center=0.5):
@@ -214,3 +215,58 @@ def get_right_and_up_axes(context, mx):
     flip_up = True if axis_up[0] < 0 else False
 
     return axis_right[1], axis_up[1], flip_right, flip_up
+
+
+# BATCHED
+
+def get_closest_edge_index(point, starts, ends):
+    '''
+    return the index of the edge closest to the point, among edges given as (N, 3) start and end coord arrays
+    closeness is the distance to the edge's line times the distance to its center, divided by its length, so long edges and edges hit near their center are favoured
+    zero length edges are never chosen
+    '''
+
+    point = np.asarray(point, dtype=np.float64)
+
+    dirs = ends - starts
+    lengths = np.linalg.norm(dirs, axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factors = np.einsum('ij,ij->i', point - starts, dirs) / lengths ** 2
+
+        line_distances = np.linalg.norm(point - (starts + dirs * factors[:, np.newaxis]), axis=1)
+        center_distances = np.linalg.norm(point - (starts + ends) / 2, axis=1)
+
+        closeness = np.where(lengths > 0, line_distances * center_distances / lengths, np.inf)
+
+    return int(np.argmin(closeness))
+
+
+def intersect_lines_line(starts, ends, line_start, line_end, epsilon=np.finfo(np.float32).eps):
+    '''
+    batched mathutils.geometry.intersect_line_line() of (N, 3) lines given by start and end coords, with a single line
+    return the closest points on the N lines, the closest points on the single line, and a mask of the lines, that aren't parallel to the single line
+    coplanar lines, within epsilon, intersect, so both closest points are the same
+    '''
+
+    line_start = np.asarray(line_start, dtype=np.float64)
+    line_dir = np.asarray(line_end, dtype=np.float64) - line_start
+
+    dirs = ends - starts
+    offsets = line_start - starts
+
+    normals = np.cross(dirs, line_dir)
+
+    distances = np.einsum('ij,ij->i', offsets, normals)
+    divs = np.einsum('ij,ij->i', normals, normals)
+
+    valid = divs != 0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factors = np.einsum('ij,ij->i', np.cross(offsets, line_dir), normals) / divs
+        points = starts + dirs * factors[:, np.newaxis]
+
+        # the points on the single line are offset along the normal, by the distance between the planes of both lines
+        others = points + normals * np.where(np.abs(distances) <= epsilon, 0, distances / divs)[:, np.newaxis]
+
+    return points, others, valid
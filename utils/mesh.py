@@ -4,156 +4,438 @@ from mathutils import Vector, Matrix
 import numpy as np
 
 
-def get_coords(mesh, mx=None, offset=0, indices=False):
-    verts = mesh.vertices
-    vert_count = len(verts)
+# BUFFERS
 
-    coords = np.empty((vert_count, 3), np.float)
-    mesh.vertices.foreach_get('co', np.reshape(coords, vert_count * 3))
+buffer_pool = {}
+
+
+def get_buffer(name, size, dtype=np.float32):
+    '''
+    return a flat view of size elements into a pooled buffer, that only ever grows, so repeated calls don't allocate
+    all views of the same name and dtype share the same memory, so a view is only valid until the next call with that name
+    '''
+
+    key = (name, np.dtype(dtype).str)
+    buffer = buffer_pool.get(key)
+
+    if buffer is None or len(buffer) < size:
+        buffer = buffer_pool[key] = np.empty(size, dtype=dtype)
+
+    return buffer[:size]
+
+
+def get_bool_buffer(value, size):
+    '''
+    return a view of size elements into a cached buffer, filled with value, that only ever grows, so repeated calls don't allocate
+    the buffer is meant to be read from only, foreach_set() does that
+    '''
+
+    key = ('bool', bool(value))
+    buffer = buffer_pool.get(key)
+
+    if buffer is None or len(buffer) < size:
+        buffer = buffer_pool[key] = np.full(size, value, dtype=bool)
+
+    return buffer[:size]
+
+
+def get_array(elements, prop, dtype=np.float32, size=1):
+    '''
+    return a new flat array of the prop of all passed in elements, read via foreach_get
+    '''
+
+    array = np.empty(len(elements) * size, dtype=dtype)
+    elements.foreach_get(prop, array)
+    return array
+
+
+def clear_buffer_pool():
+    buffer_pool.clear()
+
+
+def get_coords(mesh, mx=None, offset=0, indices=False, out=None, pool=False, chunk_size=262144):
+    '''
+    return the (N, 3) float32 vert coords of the mesh, optionally offset along the vert normals, and brought into the space of mx
+    indices: True or 'EDGE' also returns the (E, 2) edge vert indices, 'TRI' the (T, 3) loop triangle vert indices
+    out: C-contiguous float32 array of N * 3 elements to write the coords into, any shape, as reshaping any other array would copy it, and leave it unwritten
+    pool: return views into pooled buffers instead of new arrays, valid only until the next pooled call, see get_buffer()
+    chunk_size: the transformation is done in place, chunk by chunk, so only a chunk sized scratch buffer is needed on top of the coords
+    '''
+
+    vert_count = len(mesh.vertices)
+
+    if out is None:
+        out = get_buffer('coords', vert_count * 3) if pool else np.empty(vert_count * 3, dtype=np.float32)
+
+    else:
+        assert out.flags.c_contiguous and out.dtype == np.float32 and out.size == vert_count * 3, "out needs to be a C-contiguous float32 array of the mesh's vert count * 3 elements"
+
+    coords = out.reshape(-1, 3)
+    mesh.vertices.foreach_get('co', out.reshape(-1))
 
     # offset along vertex normal
     if offset:
-        normals = np.empty((vert_count, 3), np.float)
-        mesh.vertices.foreach_get('normal', np.reshape(normals, vert_count * 3))
+        normals = get_buffer('normals', vert_count * 3)
+        mesh.vertices.foreach_get('normal', normals)
 
-        coords = coords + normals * offset
+        normals *= offset
+        coords += normals.reshape(-1, 3)
 
-    # bring coords into non-local space
-    if mx:
-        coords_4d = np.ones((vert_count, 4), dtype=np.float)
-        coords_4d[:, :-1] = coords
+    # bring coords into non-local space, via a 3x3 matmul and a translation, instead of homogeneous coords
+    if mx is not None:
+        mx = np.array(mx, dtype=np.float32)
+        rot = mx[:3, :3].T
+        loc = mx[:3, 3]
 
-        coords = np.einsum('ij,aj->ai', mx, coords_4d)[:, :-1]
+        scratch = get_buffer('scratch', min(chunk_size, vert_count) * 3).reshape(-1, 3)
 
-    # float64 seems faster to calculate than 32, + the einsum turns it into 64 anyway
-    # but float32 is needed for gpu drawing, so convert
-    coords = np.float32(coords)
+        for start in range(0, vert_count, chunk_size):
+            chunk = coords[start:start + chunk_size]
+            result = scratch[:len(chunk)]
+
+            np.matmul(chunk, rot, out=result)
+            np.add(result, loc, out=chunk)
 
     if indices:
-        edges = mesh.edges
-        edge_count = len(edges)
+        if indices == 'TRI':
+            mesh.calc_loop_triangles()
+            elements, name, size = mesh.loop_triangles, 'tris', 3
 
-        indices = np.empty((edge_count, 2), 'i')
-        edges.foreach_get('vertices', np.reshape(indices, edge_count * 2))
+        else:
+            elements, name, size = mesh.edges, 'edges', 2
 
-        return coords, indices
+        count = len(elements) * size
+        idx = get_buffer(name, count, dtype=np.int32) if pool else np.empty(count, dtype=np.int32)
+        elements.foreach_get('vertices', idx)
 
+        return coords, idx.reshape(-1, size)
 
     return coords
 
 
 # MESH
 
-def hide(mesh):
-    mesh.polygons.foreach_set('hide', [True] * len(mesh.polygons))
-    mesh.edges.foreach_set('hide', [True] * len(mesh.edges))
-    mesh.vertices.foreach_set('hide', [True] * len(mesh.vertices))
+def set_mesh_state(mesh, hide=None, select=None, types={'VERT', 'EDGE', 'FACE'}, update=True):
+    '''
+    set the hide and/or select states of all elements of the passed in types, a state left at None is not touched
+    update: run a full mesh.update(), which also recalculates the normals, otherwise only tag the mesh for the depsgraph, which is enough if just the states changed
+    '''
 
-    mesh.update()
+    for type, elements in [('FACE', mesh.polygons), ('EDGE', mesh.edges), ('VERT', mesh.vertices)]:
+        if type in types:
+            for prop, value in [('hide', hide), ('select', select)]:
+                if value is not None:
+                    elements.foreach_set(prop, get_bool_buffer(value, len(elements)))
 
+    if update:
+        mesh.update()
+    else:
+        mesh.update_tag()
 
-def unhide(mesh):
-    mesh.polygons.foreach_set('hide', [False] * len(mesh.polygons))
-    mesh.edges.foreach_set('hide', [False] * len(mesh.edges))
-    mesh.vertices.foreach_set('hide', [False] * len(mesh.vertices))
 
-    mesh.update()
+def hide_faces(mesh, mask, update=True):
+    '''
+    hide the faces in the passed in face mask, as well as all edges and verts, that aren't used by any of the remaining visible faces, and unhide everything else
+    '''
 
+    visible = ~mask
 
-def unhide_select(mesh):
-    polygons = len(mesh.polygons)
-    edges = len(mesh.edges)
-    vertices = len(mesh.vertices)
+    loop_totals = get_array(mesh.polygons, 'loop_total', dtype=np.int32)
+    visible_loops = np.repeat(visible, loop_totals)
 
-    mesh.polygons.foreach_set('hide', [False] * polygons)
-    mesh.edges.foreach_set('hide', [False] * edges)
-    mesh.vertices.foreach_set('hide', [False] * vertices)
+    vert_hide = np.ones(len(mesh.vertices), dtype=bool)
+    vert_hide[get_array(mesh.loops, 'vertex_index', dtype=np.int32)[visible_loops]] = False
 
-    mesh.polygons.foreach_set('select', [True] * polygons)
-    mesh.edges.foreach_set('select', [True] * edges)
-    mesh.vertices.foreach_set('select', [True] * vertices)
+    edge_hide = np.ones(len(mesh.edges), dtype=bool)
+    edge_hide[get_array(mesh.loops, 'edge_index', dtype=np.int32)[visible_loops]] = False
 
-    mesh.update()
+    mesh.polygons.foreach_set('hide', mask)
+    mesh.edges.foreach_set('hide', edge_hide)
+    mesh.vertices.foreach_set('hide', vert_hide)
 
+    if update:
+        mesh.update()
+    else:
+        mesh.update_tag()
 
-def unhide_deselect(mesh):
-    polygons = len(mesh.polygons)
-    edges = len(mesh.edges)
-    vertices = len(mesh.vertices)
 
-    mesh.polygons.foreach_set('hide', [False] * polygons)
-    mesh.edges.foreach_set('hide', [False] * edges)
-    mesh.vertices.foreach_set('hide', [False] * vertices)
+def hide(mesh, update=True):
+    set_mesh_state(mesh, hide=True, update=update)
 
-    mesh.polygons.foreach_set('select', [False] * polygons)
-    mesh.edges.foreach_set('select', [False] * edges)
-    mesh.vertices.foreach_set('select', [False] * vertices)
 
-    mesh.update()
+def unhide(mesh, update=True):
+    set_mesh_state(mesh, hide=False, update=update)
 
 
-def select(mesh):
-    mesh.polygons.foreach_set('select', [True] * len(mesh.polygons))
-    mesh.edges.foreach_set('select', [True] * len(mesh.edges))
-    mesh.vertices.foreach_set('select', [True] * len(mesh.vertices))
+def unhide_select(mesh, update=True):
+    set_mesh_state(mesh, hide=False, select=True, update=update)
 
-    mesh.update()
 
+def unhide_deselect(mesh, update=True):
+    set_mesh_state(mesh, hide=False, select=False, update=update)
 
-def deselect(mesh):
-    mesh.polygons.foreach_set('select', [False] * len(mesh.polygons))
-    mesh.edges.foreach_set('select', [False] * len(mesh.edges))
-    mesh.vertices.foreach_set('select', [False] * len(mesh.vertices))
 
-    mesh.update()
+def select(mesh, update=True):
+    set_mesh_state(mesh, select=True, update=update)
+
+
+def deselect(mesh, update=True):
+    set_mesh_state(mesh, select=False, update=update)
+
+
+def get_face_bounds(mesh, coords=None):
+    '''
+    return the (F, 3) min and max corners of the bounding boxes of all faces, in the space of the passed in (N, 3) coords, or in local space
+    '''
+
+    if coords is None:
+        coords = get_coords(mesh)
+
+    starts = get_array(mesh.polygons, 'loop_start', dtype=np.int32)
+
+    if not len(starts):
+        return np.empty((0, 3), dtype=coords.dtype), np.empty((0, 3), dtype=coords.dtype)
+
+    # the loops of each face are consecutive, starting at its loop_start
+    loop_coords = coords[get_array(mesh.loops, 'vertex_index', dtype=np.int32)]
+
+    return np.minimum.reduceat(loop_coords, starts), np.maximum.reduceat(loop_coords, starts)
+
 
 # BMESH
 
 def blast(mesh, prop, type):
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-    bm.normal_update()
-    bm.verts.ensure_lookup_table()
+    '''
+    delete the hidden, visible or selected faces, the face mask is read from the polygons, so a bmesh is only created if there's anything to delete
+    '''
 
-    if prop == "hidden":
-        faces = [f for f in bm.faces if f.hide]
+    mask = get_array(mesh.polygons, 'select' if prop == 'selected' else 'hide', dtype=bool)
 
-    elif prop == "visible":
-        faces = [f for f in bm.faces if not f.hide]
+    if prop == 'visible':
+        mask = ~mask
 
-    elif prop == "selected":
-        faces = [f for f in bm.faces if f.select]
+    if not mask.any():
+        return
+
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.faces.ensure_lookup_table()
+
+    faces = [bm.faces[idx] for idx in np.flatnonzero(mask).tolist()]
 
     bmesh.ops.delete(bm, geom=faces, context=type)
 
     bm.to_mesh(mesh)
-    bm.clear()
+    bm.free()
 
 
 def smooth(mesh, smooth=True):
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-    bm.normal_update()
-    bm.verts.ensure_lookup_table()
+    mesh.polygons.foreach_set('use_smooth', get_bool_buffer(smooth, len(mesh.polygons)))
+    mesh.update()
 
-    for f in bm.faces:
-        f.smooth = smooth
 
-    bm.to_mesh(mesh)
-    bm.free()
+def has_extra_corner_layers(mesh):
+    '''
+    check if the mesh has face corner data, that flip_normals() can't reorder, anything besides uvs and vertex colors
+    that's custom and split normals, multires displacements of any object using the mesh, and generic corner attributes
+    '''
+
+    if mesh.has_custom_normals or mesh.use_auto_smooth:
+        return True
+
+    if any(obj.data == mesh and any(mod.type == 'MULTIRES' for mod in obj.modifiers) for obj in bpy.data.objects if obj.type == 'MESH'):
+        return True
+
+    names = {layer.name for layer in mesh.uv_layers} | {layer.name for layer in mesh.vertex_colors}
+
+    return any(attr.domain == 'CORNER' and attr.name not in names for attr in getattr(mesh, 'attributes', []))
 
 
 def flip_normals(mesh):
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-    bm.normal_update()
+    '''
+    flip all faces by reversing their loops, the first loop of each face stays in place, just like bmesh.ops.reverse_faces() does it
+    only uvs and vertex colors are reordered with the loops, for any other face corner data, see has_extra_corner_layers(), the bmesh is used
+    '''
 
-    bmesh.ops.reverse_faces(bm, faces=bm.faces)
-    bm.to_mesh(mesh)
-    bm.free()
+    if has_extra_corner_layers(mesh):
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+
+        bmesh.ops.reverse_faces(bm, faces=bm.faces)
+        bm.to_mesh(mesh)
+        bm.free()
+        return
+
+    starts = get_array(mesh.polygons, 'loop_start', dtype=np.int32)
+    totals = get_array(mesh.polygons, 'loop_total', dtype=np.int32)
+
+    # each loop's position in its face, and the first loop of its face
+    offsets = np.repeat(np.cumsum(totals) - totals, totals)
+    local = np.arange(len(offsets), dtype=np.int32) - offsets
+
+    first = np.repeat(starts, totals)
+    n = np.repeat(totals, totals)
+
+    loops = first + local
+
+    # a face's verts 0, 1, ..., n - 1 become 0, n - 1, ..., 1, and its edges 0, 1, ..., n - 1 become n - 1, ..., 0
+    vert_order = first + (-local) % n
+    edge_order = first + n - 1 - local
+
+    for prop, order in [('vertex_index', vert_order), ('edge_index', edge_order)]:
+        array = get_array(mesh.loops, prop, dtype=np.int32)
+        array[loops] = array[order]
+        mesh.loops.foreach_set(prop, array)
+
+    # loop data is tied to the corner, so it moves with the verts
+    for layers, prop, size in [(mesh.uv_layers, 'uv', 2), (mesh.vertex_colors, 'color', 4)]:
+        for layer in layers:
+            array = get_array(layer.data, prop, size=size).reshape(-1, size)
+            array[loops] = array[vert_order]
+            layer.data.foreach_set(prop, array.ravel())
+
+    mesh.update()
+
+
+def has_extra_layers(obj):
+    '''
+    check if the object's mesh has data, that join() can't carry over, like vertex colors, bevel weights, creases, vertex groups, shape keys, custom normals or generic layers
+    a single int face layer is fine, join() uses it for the face tags
+    '''
+
+    mesh = obj.data
+
+    if obj.vertex_groups or mesh.shape_keys or mesh.has_custom_normals:
+        return True
+
+    if any(getattr(mesh, name, False) for name in ['use_customdata_vertex_bevel', 'use_customdata_edge_bevel', 'use_customdata_edge_crease']):
+        return True
+
+    if any(len(getattr(mesh, name, [])) for name in ['vertex_colors', 'sculpt_vertex_colors', 'face_maps', 'skin_vertices', 'vertex_layers_float', 'vertex_layers_int', 'vertex_layers_string', 'polygon_layers_float', 'polygon_layers_string']):
+        return True
+
+    return len(mesh.polygon_layers_int) > 1
 
 
 def join(target, objects, select=[]):
+    '''
+    join the meshes of the passed in objects into the target's mesh, and remove them
+    every mesh is read via foreach_get, brought into the target's space in numpy and appended to the target mesh in one go, without any bmeshes
+    the faces are tagged in the target's int face layer with the object's index + 1, and the faces of the tags in select get selected
+    besides the geometry, uvs, seams, sharp edges, smooth faces, material indices and hide and select states are carried over
+    if any of the objects has other data, see has_extra_layers(), they are joined via bmesh_join() instead, and so are they if the target has shape keys, as the new verts need to be added to them too
+    '''
+
+    if target.data.shape_keys or any(has_extra_layers(obj) for obj in objects):
+        return bmesh_join(target, objects, select=select)
+
+    data = target.data
+    meshes = [obj.data for obj in objects]
+
+    if any([mesh.use_auto_smooth for mesh in meshes]):
+        data.use_auto_smooth = True
+
+    # the elements and props to carry over, and the element counts the index props are offset by
+    props = [('vertices', 'co', np.float32, 3, None),
+             ('vertices', 'hide', bool, 1, None),
+             ('vertices', 'select', bool, 1, None),
+             ('edges', 'vertices', np.int32, 2, 'vertices'),
+             ('edges', 'use_seam', bool, 1, None),
+             ('edges', 'use_edge_sharp', bool, 1, None),
+             ('edges', 'hide', bool, 1, None),
+             ('edges', 'select', bool, 1, None),
+             ('loops', 'vertex_index', np.int32, 1, 'vertices'),
+             ('loops', 'edge_index', np.int32, 1, 'edges'),
+             ('polygons', 'loop_start', np.int32, 1, 'loops'),
+             ('polygons', 'loop_total', np.int32, 1, None),
+             ('polygons', 'use_smooth', bool, 1, None),
+             ('polygons', 'material_index', np.int32, 1, None),
+             ('polygons', 'hide', bool, 1, None),
+             ('polygons', 'select', bool, 1, None)]
+
+    counts = {elements: [len(getattr(mesh, elements)) for mesh in [data] + meshes] for elements in ['vertices', 'edges', 'loops', 'polygons']}
+    offsets = {elements: np.cumsum([0] + c[:-1]) for elements, c in counts.items()}
+
+    arrays = {}
+
+    for elements, prop, dtype, size, offset in props:
+        chunks = []
+
+        for idx, mesh in enumerate([data] + meshes):
+            chunk = get_array(getattr(mesh, elements), prop, dtype=dtype, size=size)
+
+            if offset:
+                chunk += offsets[offset][idx]
+
+            chunks.append(chunk)
+
+        arrays[(elements, prop)] = chunks
+
+    # bring the coords into the target's local space
+    mxi = target.matrix_world.inverted()
+
+    for obj, coords in zip(objects, arrays[('vertices', 'co')][1:]):
+        mx = np.array(mxi @ obj.matrix_world, dtype=np.float32)
+        coords = coords.reshape(-1, 3)
+
+        coords[:] = coords @ mx[:3, :3].T + mx[:3, 3]
+
+    arrays = {key: np.concatenate(chunks) for key, chunks in arrays.items()}
+
+    # tag the faces, the target's keep their existing tags, if the layer exists already
+    layer = data.polygon_layers_int[0] if data.polygon_layers_int else None
+
+    tags = [get_array(layer.data, 'value', dtype=np.int32) if layer else np.zeros(counts['polygons'][0], dtype=np.int32)]
+    tags.extend(np.full(count, idx + 1, dtype=np.int32) for idx, count in enumerate(counts['polygons'][1:]))
+    tags = np.concatenate(tags)
+
+    # select the tagged faces, and their edges and verts
+    if select:
+        mask = np.isin(tags, select)
+        loops = np.repeat(mask, arrays[('polygons', 'loop_total')])
+
+        arrays[('polygons', 'select')] |= mask
+        arrays[('edges', 'select')][arrays[('loops', 'edge_index')][loops]] = True
+        arrays[('vertices', 'select')][arrays[('loops', 'vertex_index')][loops]] = True
+
+    # uvs are matched by name, and missing ones are zero filled
+    uvs = {}
+
+    for idx, mesh in enumerate([data] + meshes):
+        for uv in mesh.uv_layers:
+            if uv.name not in uvs:
+                uvs[uv.name] = [np.zeros(count * 2, dtype=np.float32) for count in counts['loops']]
+
+            uvs[uv.name][idx] = get_array(uv.data, 'uv', size=2)
+
+    # append the new elements and write all the arrays
+    for elements in ['vertices', 'edges', 'loops', 'polygons']:
+        getattr(data, elements).add(sum(counts[elements][1:]))
+
+    for elements, prop, _, _, _ in props:
+        getattr(data, elements).foreach_set(prop, arrays[(elements, prop)])
+
+    if not layer:
+        layer = data.polygon_layers_int.new()
+
+    layer.data.foreach_set('value', tags)
+
+    for name, chunks in uvs.items():
+        uv = data.uv_layers.get(name) or data.uv_layers.new(name=name)
+        uv.data.foreach_set('uv', np.concatenate(chunks))
+
+    data.update()
+
+    # several objects may share the same mesh
+    for mesh in set(meshes):
+        remove_mesh(mesh)
+
+
+def bmesh_join(target, objects, select=[]):
+    '''
+    the bmesh based join(), which carries over all mesh data layers, used by join() for sources with layers it can't carry over
+    '''
+
     mxi = target.matrix_world.inverted()
 
     bm = bmesh.new()
@@ -186,7 +468,7 @@ def join(target, objects, select=[]):
 
         bm.from_mesh(mesh)
 
-        bpy.data.meshes.remove(mesh, do_unlink=True)
+        remove_mesh(mesh)
 
     if select:
         for f in bm.faces:
@@ -195,3 +477,93 @@ def join(target, objects, select=[]):
 
     bm.to_mesh(target.data)
     bm.clear()
+
+
+def add_faces(bm, coords, indices, sizes, smooth=False, sharp=None):
+    '''
+    add faces to the bmesh in one go, by writing them to a temporary mesh via foreach_set, and appending that to the bmesh, instead of creating every vert and face individually
+    coords are (N, 3) arrays, indices are the flat vert indices of all faces, and sizes the vert counts of the faces
+    sharp: loop indices, whose edges, from the loop's vert to the next one in its face, are marked sharp
+    return the new verts and faces
+    '''
+
+    mesh = bpy.data.meshes.new(name='add_faces')
+
+    mesh.vertices.add(len(coords))
+    mesh.vertices.foreach_set('co', np.asarray(coords, dtype=np.float32).ravel())
+
+    mesh.loops.add(len(indices))
+    mesh.loops.foreach_set('vertex_index', np.asarray(indices, dtype=np.int32))
+
+    sizes = np.asarray(sizes, dtype=np.int32)
+
+    mesh.polygons.add(len(sizes))
+    mesh.polygons.foreach_set('loop_start', np.cumsum(sizes, dtype=np.int32) - sizes)
+    mesh.polygons.foreach_set('loop_total', sizes)
+    mesh.polygons.foreach_set('use_smooth', np.full(len(sizes), smooth, dtype=bool))
+
+    mesh.update(calc_edges=True)
+
+    if sharp is not None and len(sharp):
+        edges = np.zeros(len(mesh.edges), dtype=bool)
+        edges[get_array(mesh.loops, 'edge_index', dtype=np.int32)[sharp]] = True
+
+        mesh.edges.foreach_set('use_edge_sharp', edges)
+
+    vert_count = len(bm.verts)
+    face_count = len(bm.faces)
+
+    # from_mesh() also takes the mesh's active face, which would replace the bmesh's
+    active = bm.faces.active
+
+    bm.from_mesh(mesh)
+
+    bm.faces.active = active
+
+    bpy.data.meshes.remove(mesh, do_unlink=True)
+
+    bm.verts.ensure_lookup_table()
+    bm.faces.ensure_lookup_table()
+
+    return bm.verts[vert_count:], bm.faces[face_count:]
+
+
+# REVISIONS
+
+mesh_revisions = {}
+
+
+def get_mesh_revision(mesh):
+    '''
+    return the amount of geometry updates the depsgraph has reported for the mesh, see handlers.update_mesh_revisions
+    used as an edit counter to validate mesh based caches
+    '''
+
+    return mesh_revisions.get(mesh.as_pointer(), 0)
+
+
+def bump_mesh_revision(mesh):
+    key = mesh.as_pointer()
+    mesh_revisions[key] = mesh_revisions.get(key, 0) + 1
+
+
+def remove_mesh(mesh):
+    '''
+    remove the mesh datablock, and drop everything cached for it first
+    all mesh caches are keyed by the mesh's memory address, which a mesh created afterwards could reuse, and so would otherwise be handed the removed mesh's graph, analysis or bvh
+    '''
+
+    from . graph import mesh_graphs
+    from . analysis import face_analyses, mesh_issues
+    from . selection import remove_selection_snapshot
+    from . raycast import remove_bvh
+
+    key = mesh.as_pointer()
+
+    for cache in [mesh_revisions, mesh_graphs, face_analyses, mesh_issues]:
+        cache.pop(key, None)
+
+    remove_selection_snapshot(mesh)
+    remove_bvh(mesh)
+
+    bpy.data.meshes.remove(mesh, do_unlink=True)
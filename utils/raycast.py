@@ -1,20 +1,204 @@
 import bpy
 from bpy_extras.view3d_utils import region_2d_to_origin_3d, region_2d_to_vector_3d
-import bmesh
 from mathutils.bvhtree import BVHTree as BVH
+from collections import OrderedDict
+import numpy as np
 import sys
+from . mesh import get_mesh_revision
+
+
+# BVH CACHE
+
+# BVHs and the mesh arrays they are built from, keyed by mesh datablock and kept in least recently used order
+bvh_cache = OrderedDict()
+
+# rough memory budget of the cache in bytes, the least recently used entries are dropped once it's exceeded
+bvh_cache_budget = 1024 ** 3
+
+# local space bounds of original meshes, keyed by mesh datablock, as (revision, vert count, min, max) tuples
+mesh_bounds = {}
+
+
+def is_evaluated_bvh(obj, depsgraph=None):
+    '''
+    check if the object's bvh is built from its evaluated mesh instead of its original one, see get_bvh()
+    '''
+
+    return bool(depsgraph) and obj.mode == 'OBJECT' and any(mod.show_viewport for mod in obj.modifiers)
+
+
+def get_bvh(obj, depsgraph=None):
+    '''
+    return the cached bvh of the object's mesh, as a dict with the 'bvh' and the arrays it was built from
+    the bvh is built from the loop triangles, 'tri_polygons' maps the triangle indices it returns to polygon indices
+    entries are rebuilt if the mesh revision changed, see handlers.update_mesh_revisions
+
+    the bvh is in mesh space, so all objects sharing a mesh, like linked duplicates, share the same bvh
+    with a depsgraph passed in, object mode objects with modifiers use their evaluated mesh instead, which is unique per object
+    evaluated meshes are temporary, and their addresses get reused, so their entries are keyed by the object and its original mesh instead
+    '''
+
+    mesh = obj.data
+    revision = get_mesh_revision(mesh)
+
+    key = mesh.as_pointer()
+
+    if is_evaluated_bvh(obj, depsgraph=depsgraph):
+        mesh = obj.evaluated_get(depsgraph).data
+        key = (obj.as_pointer(), key)
+
+    counts = (len(mesh.vertices), len(mesh.polygons))
+
+    entry = bvh_cache.get(key)
+
+    if entry and entry['revision'] == revision and entry['counts'] == counts:
+        bvh_cache.move_to_end(key)
+        return entry
+
+    vert_count, polygon_count = counts
+    loop_count = len(mesh.loops)
+
+    mesh.calc_loop_triangles()
+    tri_count = len(mesh.loop_triangles)
+
+    coords = np.empty((vert_count, 3), dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords.ravel())
+
+    tris = np.empty((tri_count, 3), dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', tris.ravel())
+
+    tri_polygons = np.empty(tri_count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('polygon_index', tri_polygons)
+
+    # polygon verts, used to look up hit faces
+    loop_starts = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+
+    loop_totals = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+
+    loop_verts = np.empty(loop_count, dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+
+    # FromPolygons() reads its input via the python sequence protocol, and has no buffer path, numpy arrays or row views would be read element by element as numpy scalars
+    # tolist() is the fastest way to hand them over, so the only per element conversion left is this single one, the arrays themselves are still kept for the face lookups
+    entry = {'revision': revision,
+             'counts': counts,
+             'bvh': BVH.FromPolygons(coords.tolist(), tris.tolist(), all_triangles=True),
+             'coords': coords,
+             'tri_polygons': tri_polygons,
+             'loop_starts': loop_starts,
+             'loop_totals': loop_totals,
+             'loop_verts': loop_verts,
+
+             # very rough estimate of the memory held by the arrays and the bvh tree
+             'size': coords.nbytes + tri_polygons.nbytes + loop_starts.nbytes + loop_totals.nbytes + loop_verts.nbytes + tri_count * 100}
+
+    bvh_cache[key] = entry
+
+    # drop the least recently used entries until the budget is met, but always keep the new one
+    while len(bvh_cache) > 1 and sum(cached['size'] for cached in bvh_cache.values()) > bvh_cache_budget:
+        bvh_cache.popitem(last=False)
+
+    return entry
+
+
+def get_face_coords(entry, index):
+    '''
+    return the local space coords of the verts of the polygon with the passed in index, in loop order, from a cached bvh entry
+    '''
+
+    start = entry['loop_starts'][index]
+    return entry['coords'][entry['loop_verts'][start:start + entry['loop_totals'][index]]]
+
+
+def get_bmesh_bvh(bm):
+    '''
+    return an uncached bvh entry built directly from the bmesh, like get_bvh() does from the mesh
+    the bvh is a snapshot, and so unaffected by later changes to the bmesh, its face indices are those of the bmesh, so no 'tri_polygons' are needed
+    '''
+
+    return {'bvh': BVH.FromBMesh(bm),
+            'tri_polygons': None}
+
+
+def remove_bvh(mesh):
+    '''
+    drop the mesh's cached bvh, as well as those of the evaluated meshes of the objects using it
+    required before removing a mesh datablock, as its memory address could be reused by a new mesh
+    '''
+
+    pointer = mesh.as_pointer()
+
+    mesh_bounds.pop(pointer, None)
+
+    for key in [key for key in bvh_cache if key == pointer or (isinstance(key, tuple) and key[1] == pointer)]:
+        del bvh_cache[key]
+
+
+def clear_bvh_cache():
+    bvh_cache.clear()
+    mesh_bounds.clear()
+
+
+def clear_evaluated_bvhs():
+    '''
+    drop the cached bvhs of all evaluated meshes
+    their revisions are those of the original meshes, so changes of the evaluated meshes alone, like animated modifiers, aren't caught by them
+    '''
+
+    for key in [key for key in bvh_cache if isinstance(key, tuple)]:
+        del bvh_cache[key]
+
+
+def get_mesh_bounds(mesh):
+    '''
+    return the local space min and max of the original mesh's vert coords, which is what the bvh of an original mesh is built from
+    cached per mesh, and recalculated if the mesh revision or vert count changed
+    '''
+
+    key = mesh.as_pointer()
+    revision = get_mesh_revision(mesh)
+    vert_count = len(mesh.vertices)
+
+    bounds = mesh_bounds.get(key)
+
+    if bounds and bounds[0] == revision and bounds[1] == vert_count:
+        return bounds[2], bounds[3]
+
+    if vert_count:
+        coords = np.empty((vert_count, 3), dtype=np.float32)
+        mesh.vertices.foreach_get('co', coords.ravel())
+
+        mins, maxs = coords.min(axis=0).astype(np.float64), coords.max(axis=0).astype(np.float64)
+
+    else:
+        mins, maxs = np.zeros(3), np.zeros(3)
+
+    mesh_bounds[key] = (revision, vert_count, mins, maxs)
+    return mins, maxs
 
 
 # RAYCASTING BVH
 
-def cast_bvh_ray_from_mouse(mousepos, candidates=None, bmeshes={}, bvhs={}, debug=False):
+def cast_bvh_ray_from_mouse(mousepos, candidates=None, depsgraph=None, bvhs=None, debug=False):
+    '''
+    cast against the cached bvhs of the candidates, the ray is transformed into each object's local space, so instances share their bvh
+    with a depsgraph passed in, objects with modifiers are cast against their evaluated meshes, and the returned face index refers to those
+    bvhs: dict of bvh entries keyed by object name, used instead of the cached ones, see get_bmesh_bvh()
+    '''
+
     region = bpy.context.region
     region_data = bpy.context.region_data
 
     origin_3d = region_2d_to_origin_3d(region, region_data, mousepos)
     vector_3d = region_2d_to_vector_3d(region, region_data, mousepos)
 
-    objects = [(obj, None) for obj in candidates if obj.type == "MESH"]
+    # get candidate objects, that could be hit
+    if not candidates:
+        candidates = bpy.context.visible_objects
+
+    objects = [obj for obj in candidates if obj.type == "MESH"]
 
     hitobj = None
     hitlocation = None
@@ -22,36 +206,21 @@ def cast_bvh_ray_from_mouse(mousepos, candidates=None, bmeshes={}, bvhs={}, debu
     hitindex = None
     hitdistance = sys.maxsize
 
-    cache = {'bmesh': {},
-             'bvh': {}}
-
-    for obj, src in objects:
+    for obj in objects:
         mx = obj.matrix_world
         mxi = mx.inverted_safe()
 
         ray_origin = mxi @ origin_3d
         ray_direction = mxi.to_3x3() @ vector_3d
 
-        # use cached bmesh if possible
-        if obj.name in bmeshes:
-            # print("fetching existing bmesh")
-            bm = bmeshes[obj.name]
-        else:
-            # print("creating new bmesh")
-            bm = bmesh.new()
-            bm.from_mesh(obj.data)
-            cache['bmesh'][obj.name] = bm
-
-        # use cached bvh if possible
-        if obj.name in bvhs:
-            # print("fetching exsiting BVH")
-            bvh = bvhs[obj.name]
-        else:
-            # print("creating new BVH")
-            bvh = BVH.FromBMesh(bm)
-            cache['bvh'][obj.name] = bvh
-
-        location, normal, index, distance = bvh.ray_cast(ray_origin, ray_direction)
+        # fetch the bvh from the cache, building it only if the mesh changed since the last raycast
+        entry = bvhs[obj.name] if bvhs and obj.name in bvhs else get_bvh(obj, depsgraph=depsgraph)
+
+        location, normal, index, distance = entry['bvh'].ray_cast(ray_origin, ray_direction)
+
+        # the bvh is made of loop triangles, get the polygon index
+        if index is not None and entry['tri_polygons'] is not None:
+            index = int(entry['tri_polygons'][index])
 
         # recalculate distance in worldspace
         if distance:
@@ -69,10 +238,257 @@ def cast_bvh_ray_from_mouse(mousepos, candidates=None, bmeshes={}, bvhs={}, debu
         print()
 
     if hitobj:
-        return hitobj, hitlocation, hitnormal, hitindex, hitdistance, cache
+        return hitobj, hitlocation, hitnormal, hitindex, hitdistance
+
+    return None, None, None, None, None
+
+
+# RAYCASTING BATCH
+
+def get_region_rays(coords, region=None, region_data=None):
+    '''
+    vectorized version of region_2d_to_origin_3d() and region_2d_to_vector_3d()
+    return (N, 3) world space ray origins and normalized directions for (N, 2) region coords
+    '''
+
+    if not region:
+        region = bpy.context.region
+
+    if not region_data:
+        region_data = bpy.context.region_data
+
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+    viewinv = np.array(region_data.view_matrix.inverted())
+    persinv = np.array(region_data.perspective_matrix.inverted())
+
+    dx = 2 * coords[:, 0] / region.width - 1
+    dy = 2 * coords[:, 1] / region.height - 1
+
+    if region_data.is_perspective:
+        origins = np.tile(viewinv[:3, 3], (len(coords), 1))
+
+        out = np.column_stack((dx, dy, np.full(len(coords), -0.5)))
+        w = out @ persinv[3, :3] + persinv[3, 3]
+
+        directions = (out @ persinv[:3, :3].T + persinv[:3, 3]) / w[:, np.newaxis] - viewinv[:3, 3]
+
+    else:
+        origins = np.outer(dx, persinv[:3, 0]) + np.outer(dy, persinv[:3, 1]) + persinv[:3, 3]
+
+        # this value is scaled to the far clip already
+        if region_data.view_perspective != 'CAMERA':
+            origins -= persinv[:3, 2]
+
+        directions = np.tile(-viewinv[:3, 2], (len(coords), 1))
+
+    directions /= np.linalg.norm(directions, axis=1)[:, np.newaxis]
 
-    # the cache is always returned!
-    return None, None, None, None, None, cache
+    return origins, directions
+
+
+def cast_bvh_rays(origins, directions, candidates=None, depsgraph=None):
+    '''
+    cast (N, 3) world space rays against the cached bvhs of the candidates, see get_bvh()
+    the directions don't need to be normalized, they are normalized here, so the box distances can be compared to the hit distances
+    rays are culled per object using the world space bounding box of the mesh its bvh is built from, see get_bvh_bounds(), and only cast if they could still produce a closer hit
+
+    return the list of mesh objects that were cast against, and numpy arrays of
+    the indices of the hit objects in that list, hit locations, hit normals, face indices and distances
+    misses have an object and face index of -1 and an infinite distance
+    '''
+
+    # get candidate objects, that could be hit
+    if not candidates:
+        candidates = bpy.context.visible_objects
+
+    objects = [obj for obj in candidates if obj.type == "MESH"]
+
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    directions = np.array(directions, dtype=np.float64).reshape(-1, 3)
+    ray_count = len(origins)
+
+    lengths = np.linalg.norm(directions, axis=1)
+    directions[lengths > 0] /= lengths[lengths > 0, np.newaxis]
+
+    hitids = np.full(ray_count, -1, dtype=np.int32)
+    hitlocations = np.zeros((ray_count, 3))
+    hitnormals = np.zeros((ray_count, 3))
+    hitindices = np.full(ray_count, -1, dtype=np.int32)
+    hitdistances = np.full(ray_count, np.inf)
+
+    # avoid the divide by zero of axis aligned rays in the slab tests
+    safe_directions = directions.copy()
+    safe_directions[np.abs(safe_directions) < 1e-12] = 1e-12
+
+    for objidx, (obj, mins, maxs) in enumerate(zip(objects, *get_bvh_bounds(objects, depsgraph=depsgraph))):
+
+        # slab test of all rays against the object's bounding box, then skip rays that already hit something closer
+        t1 = (mins - origins) / safe_directions
+        t2 = (maxs - origins) / safe_directions
+
+        tnear = np.minimum(t1, t2).max(axis=1)
+        tfar = np.maximum(t1, t2).min(axis=1)
+
+        rayidxs = np.flatnonzero((tnear <= tfar) & (tfar >= 0) & (tnear < hitdistances))
+
+        if not len(rayidxs):
+            continue
+
+        mx = np.array(obj.matrix_world)
+        mxi = np.array(obj.matrix_world.inverted_safe())
+
+        # transform the rays into the object's local space, where the bvh is
+        ray_origins = origins[rayidxs] @ mxi[:3, :3].T + mxi[:3, 3]
+        ray_directions = directions[rayidxs] @ mxi[:3, :3].T
+
+        entry = get_bvh(obj, depsgraph=depsgraph)
+        ray_cast = entry['bvh'].ray_cast
+
+        hits = []
+
+        for rayidx, origin, direction in zip(rayidxs.tolist(), ray_origins.tolist(), ray_directions.tolist()):
+            location, normal, index, distance = ray_cast(origin, direction)
+
+            if location is not None:
+                hits.append((rayidx, location, normal, index))
+
+        if not hits:
+            continue
+
+        rayidxs = np.array([hit[0] for hit in hits], dtype=np.int64)
+        locations = np.array([hit[1] for hit in hits]) @ mx[:3, :3].T + mx[:3, 3]
+        normals = np.array([hit[2] for hit in hits]) @ mx[:3, :3].T
+        indices = entry['tri_polygons'][[hit[3] for hit in hits]]
+
+        # recalculate distance in worldspace, and keep only the closer hits
+        distances = np.linalg.norm(locations - origins[rayidxs], axis=1)
+        closer = distances < hitdistances[rayidxs]
+
+        rayidxs = rayidxs[closer]
+
+        hitids[rayidxs] = objidx
+        hitlocations[rayidxs] = locations[closer]
+        hitnormals[rayidxs] = normals[closer]
+        hitindices[rayidxs] = indices[closer]
+        hitdistances[rayidxs] = distances[closer]
+
+    return objects, hitids, hitlocations, hitnormals, hitindices, hitdistances
+
+
+def cast_bvh_rays_from_region(coords, candidates=None, depsgraph=None):
+    '''
+    cast rays from (N, 2) region coords, see cast_bvh_rays()
+    '''
+
+    origins, directions = get_region_rays(coords)
+
+    return cast_bvh_rays(origins, directions, candidates=candidates, depsgraph=depsgraph)
+
+
+# OBJECT BOUNDS
+
+# world space bounding boxes of objects, keyed by object pointer, as (min, max, matrix) tuples, the matrix being the world matrix the box was calculated with
+object_bounds = {}
+
+
+def get_object_bounds(objects):
+    '''
+    return (N, 3) arrays of the world space bounding box mins and maxs of the passed in objects
+    only objects, whose transform or geometry changed since the last call are updated, see handlers.update_object_bounds
+    boxes are also recalculated, whenever the world matrix differs from the one they were calculated with, so animated transforms are always up to date
+    '''
+
+    outdated = [obj for obj in objects if obj.as_pointer() not in object_bounds or object_bounds[obj.as_pointer()][2] != obj.matrix_world]
+
+    if outdated:
+        corners = np.array([obj.bound_box for obj in outdated], dtype=np.float64).reshape(-1, 8, 3)
+
+        for obj, mins, maxs in zip(outdated, *transform_bounds(corners, outdated)):
+            object_bounds[obj.as_pointer()] = (mins, maxs, obj.matrix_world.copy())
+
+    if not objects:
+        return np.empty((0, 3)), np.empty((0, 3))
+
+    bounds = [object_bounds[obj.as_pointer()] for obj in objects]
+
+    return np.array([b[0] for b in bounds]), np.array([b[1] for b in bounds])
+
+
+def get_bvh_bounds(objects, depsgraph=None):
+    '''
+    return (N, 3) arrays of the world space bounding box mins and maxs of the meshes, the bvhs of the passed in objects are built from, see get_bvh()
+    objects using their evaluated mesh get their object bounds, see get_object_bounds(), as obj.bound_box is that of the evaluated mesh
+    all others get the bounds of their original mesh, see get_mesh_bounds(), as modifiers or shape keys can move the evaluated mesh away from it
+    '''
+
+    mins = np.empty((len(objects), 3))
+    maxs = np.empty((len(objects), 3))
+
+    evaluated = np.array([is_evaluated_bvh(obj, depsgraph=depsgraph) for obj in objects], dtype=bool)
+
+    if evaluated.any():
+        mins[evaluated], maxs[evaluated] = get_object_bounds([obj for obj, is_evaluated in zip(objects, evaluated) if is_evaluated])
+
+    original = [obj for obj, is_evaluated in zip(objects, evaluated) if not is_evaluated]
+
+    if original:
+        bounds = np.array([get_mesh_bounds(obj.data) for obj in original])
+
+        # the 8 corners of each box, from its min and max
+        corners = bounds[:, [[0, 0, 0], [0, 0, 1], [0, 1, 0], [0, 1, 1], [1, 0, 0], [1, 0, 1], [1, 1, 0], [1, 1, 1]], [0, 1, 2]]
+
+        mins[~evaluated], maxs[~evaluated] = transform_bounds(corners, original)
+
+    return mins, maxs
+
+
+def transform_bounds(corners, objects):
+    '''
+    transform the (N, 8, 3) local space box corners of the passed in objects into world space
+    return (N, 3) arrays of the world space box mins and maxs, padded a little, to be safe with flat objects and float precision
+    '''
+
+    mxs = np.array([obj.matrix_world for obj in objects], dtype=np.float64)
+
+    # transform all 8 corners of each box into world space at once
+    corners = np.einsum('aij,akj->aki', mxs[:, :3, :3], corners) + mxs[:, np.newaxis, :3, 3]
+
+    mins = corners.min(axis=1)
+    maxs = corners.max(axis=1)
+
+    padding = np.maximum((maxs - mins).max(axis=1), 1)[:, np.newaxis] * 1e-5
+
+    return mins - padding, maxs + padding
+
+
+def remove_object_bounds(obj):
+    object_bounds.pop(obj.as_pointer(), None)
+
+
+def clear_object_bounds():
+    object_bounds.clear()
+
+
+def intersect_ray_bounds(origin, direction, mins, maxs):
+    '''
+    vectorized slab test of a ray against (N, 3) bounding boxes
+    return the distances along the ray, where it enters the boxes, and a mask of the boxes that are hit at all
+    '''
+
+    origin = np.array(origin, dtype=np.float64)
+    direction = np.array(direction, dtype=np.float64)
+
+    # avoid the divide by zero of axis aligned rays
+    direction[np.abs(direction) < 1e-12] = 1e-12
+
+    t1 = (mins - origin) / direction
+    t2 = (maxs - origin) / direction
+
+    tnear = np.minimum(t1, t2).max(axis=1)
+    tfar = np.maximum(t1, t2).min(axis=1)
+
+    return np.maximum(tnear, 0), (tnear <= tfar) & (tfar >= 0)
 
 
 # RAYCASTING OBJ
@@ -97,7 +513,22 @@ def cast_obj_ray_from_mouse(mousepos, depsgraph=None, candidates=None, debug=Fal
     hitindex = None
     hitdistance = sys.maxsize
 
-    for obj in objects:
+    # cull the objects, whose bounding boxes aren't hit, and sort the rest front to back
+    mins, maxs = get_object_bounds(objects)
+
+    tnear, mask = intersect_ray_bounds(origin_3d, vector_3d, mins, maxs)
+
+    tnear = tnear.tolist()
+    front_to_back = sorted(np.flatnonzero(mask).tolist(), key=lambda idx: tnear[idx])
+
+    for idx in front_to_back:
+
+        # none of the remaining objects can be hit closer than what has been hit already
+        if tnear[idx] > hitdistance:
+            break
+
+        obj = objects[idx]
+
         mx = obj.matrix_world
         mxi = mx.inverted_safe()
 
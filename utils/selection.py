@@ -1,70 +1,108 @@
+import bmesh
+import numpy as np
 
 
-# SORTING
+# SNAPSHOTS
 
-def get_selected_vert_sequences(verts, ensure_seq_len=False, debug=False):
-    """
-    return sorted lists of vertices, where vertices are considered connected if their edges are selected, and faces are not selected
-    """
-    sequences = []
+selection_snapshots = {}
 
-    # if edge loops are non-cyclic, it matters at what vert you start the sorting
-    noncyclicstartverts = [v for v in verts if len([e for e in v.link_edges if e.select]) == 1]
 
-    if noncyclicstartverts:
-        v = noncyclicstartverts[0]
+def get_selection_counts(mesh):
+    '''
+    return the selected vert, edge and face counts of an edit mesh, without touching any elements
+    '''
 
-    # in cyclic edge loops, any vert works
-    else:
-        v = verts[0]
+    return mesh.total_vert_sel, mesh.total_edge_sel, mesh.total_face_sel
 
-    seq = []
 
-    while verts:
-        seq.append(v)
+def get_selection(mesh, bm=None):
+    '''
+    return a snapshot of the edit mesh selection: boolean masks and index arrays of the selected verts, edges and faces
+    the snapshot is cached per mesh, removed on depsgraph updates of the mesh, and rebuilt if the element or selection counts change, or if any of its selected elements is no longer selected
+    with the same selection counts, the latter means the selection is identical, and it only touches the selected elements
+    '''
 
-        # safty precaution,for EPanel, where people may select intersecting edge loops
-        if v not in verts:
-            break
+    if not bm:
+        bm = bmesh.from_edit_mesh(mesh)
 
-        else:
-            verts.remove(v)
+    key = mesh.as_pointer()
+    signature = (len(bm.verts), len(bm.edges), len(bm.faces)) + get_selection_counts(mesh)
 
-        if v in noncyclicstartverts:
-            noncyclicstartverts.remove(v)
+    snapshot = selection_snapshots.get(key)
 
-        nextv = [e.other_vert(v) for e in v.link_edges if e.select and e.other_vert(v) not in seq]
+    if snapshot and snapshot['signature'] == signature and is_snapshot_selected(snapshot, bm):
+        return snapshot
 
-        # next vert in sequence
-        if nextv:
-            v = nextv[0]
+    vert_count, edge_count, face_count = signature[:3]
+
+    vert_mask = np.fromiter((v.select for v in bm.verts), dtype=bool, count=vert_count)
+    edge_mask = np.fromiter((e.select for e in bm.edges), dtype=bool, count=edge_count)
+    face_mask = np.fromiter((f.select for f in bm.faces), dtype=bool, count=face_count)
+
+    snapshot = {'signature': signature,
+                'vert_mask': vert_mask,
+                'edge_mask': edge_mask,
+                'face_mask': face_mask,
+                'verts': np.flatnonzero(vert_mask),
+                'edges': np.flatnonzero(edge_mask),
+                'faces': np.flatnonzero(face_mask)}
+
+    selection_snapshots[key] = snapshot
+    return snapshot
+
+
+def is_snapshot_selected(snapshot, bm):
+    '''
+    check if the snapshot's selected verts, edges and faces are all still selected in the bmesh
+    '''
+
+    for seq, name in [(bm.verts, 'verts'), (bm.edges, 'edges'), (bm.faces, 'faces')]:
+        if len(snapshot[name]):
+            seq.ensure_lookup_table()
+
+            if not all(seq[idx].select for idx in snapshot[name].tolist()):
+                return False
+
+    return True
+
+
+def get_selected(mesh, bm, types={'VERT', 'EDGE', 'FACE'}):
+    '''
+    return lists of the selected BMVerts, BMEdges and BMFaces in index order, just like a scan of the bmesh would, based on the selection snapshot
+    the lists of types not requested stay empty
+    '''
+
+    snapshot = get_selection(mesh, bm=bm)
+
+    selected = []
+
+    for type, seq, name in [('VERT', bm.verts, 'verts'), ('EDGE', bm.edges, 'edges'), ('FACE', bm.faces, 'faces')]:
+        if type in types and len(snapshot[name]):
+            seq.ensure_lookup_table()
+            selected.append([seq[idx] for idx in snapshot[name].tolist()])
 
-        # finished a sequence
         else:
-            # determine cyclicity
-            cyclic = True if len([e for e in v.link_edges if e.select]) == 2 else False
+            selected.append([])
 
-            # store sequence and cyclicity
-            sequences.append((seq, cyclic))
+    return selected
 
-            # start a new sequence, if there are still verts left
-            if verts:
-                if noncyclicstartverts:
-                    v = noncyclicstartverts[0]
-                else:
-                    v = verts[0]
 
-                seq = []
+def remove_selection_snapshot(mesh):
+    selection_snapshots.pop(mesh.as_pointer(), None)
 
-    # again for EPanel, make sure sequences are longer than one vert
-    if ensure_seq_len:
-        seqs = []
 
-        for seq, cyclic in sequences:
-            if len(seq) > 1:
-                seqs.append((seq, cyclic))
+# SORTING
 
-        sequences = seqs
+def get_selected_vert_sequences(verts, ensure_seq_len=False, debug=False):
+    """
+    return sorted lists of vertices, where vertices are considered connected if their edges are selected, and faces are not selected
+    """
+
+    sequences = sort_vert_sequences(verts, lambda v: [e for e in v.link_edges if e.select])
+
+    # again for EPanel, make sure sequences are longer than one vert
+    if ensure_seq_len:
+        sequences = [(seq, cyclic) for seq, cyclic in sequences if len(seq) > 1]
 
     if debug:
         for seq, cyclic in sequences:
@@ -78,28 +116,71 @@ def get_edges_vert_sequences(verts, edges, debug=False):
     return sorted lists of vertices, where vertices are considered connected if they are verts of the passed in edges
     selection states are completely ignored.
     """
+
+    edges = set(edges)
+
+    sequences = sort_vert_sequences(verts, lambda v: [e for e in v.link_edges if e in edges])
+
+    if debug:
+        for verts, cyclic in sequences:
+            print(cyclic, [v.index for v in verts])
+
+    return sequences
+
+
+def sort_vert_sequences(verts, get_link_edges):
+    """
+    sort verts into (sequence, cyclic) tuples, walking along the edges get_link_edges() returns for each vert
+    runs in linear time, as every vert and edge is only visited once, and all lookups are done in sets
+    like before, the processed verts are removed from the passed in list
+    """
+
     sequences = []
 
+    if not verts:
+        return sequences
+
+    # cache the connecting edges of each vert, they are looked up several times
+    links = {}
+
+    def get_links(v):
+        if v not in links:
+            links[v] = get_link_edges(v)
+        return links[v]
+
+    remaining = set(verts)
+
     # if edge loops are non-cyclic, it matters at what vert you start the sorting
-    noncyclicstartverts = [v for v in verts if len([e for e in v.link_edges if e in edges]) == 1]
+    noncyclicstartverts = [v for v in verts if len(get_links(v)) == 1]
 
-    if noncyclicstartverts:
-        v = noncyclicstartverts[0]
+    # instead of removing processed verts from the lists, keep track of the first one, that hasn't been processed yet
+    pointers = [0, 0]
 
-    # in cyclic edge loops, any vert works
-    else:
-        v = verts[0]
+    def get_start_vert():
+        for idx, candidates in enumerate([noncyclicstartverts, verts]):
+            while pointers[idx] < len(candidates) and candidates[pointers[idx]] not in remaining:
+                pointers[idx] += 1
+
+            if pointers[idx] < len(candidates):
+                return candidates[pointers[idx]]
+
+    v = get_start_vert()
 
     seq = []
+    seen = set()
 
-    while verts:
+    while remaining:
         seq.append(v)
-        verts.remove(v)
+        seen.add(v)
 
-        if v in noncyclicstartverts:
-            noncyclicstartverts.remove(v)
+        # safty precaution,for EPanel, where people may select intersecting edge loops
+        if v not in remaining:
+            break
 
-        nextv = [e.other_vert(v) for e in v.link_edges if e in edges and e.other_vert(v) not in seq]
+        else:
+            remaining.remove(v)
+
+        nextv = [e.other_vert(v) for e in get_links(v) if e.other_vert(v) not in seen]
 
         # next vert in sequence
         if nextv:
@@ -108,23 +189,19 @@ def get_edges_vert_sequences(verts, edges, debug=False):
         # finished a sequence
         else:
             # determine cyclicity
-            cyclic = True if len([e for e in v.link_edges if e in edges]) == 2 else False
+            cyclic = True if len(get_links(v)) == 2 else False
 
             # store sequence and cyclicity
             sequences.append((seq, cyclic))
 
             # start a new sequence, if there are still verts left
-            if verts:
-                if noncyclicstartverts:
-                    v = noncyclicstartverts[0]
-                else:
-                    v = verts[0]
+            if remaining:
+                v = get_start_vert()
 
                 seq = []
+                seen = set()
 
-    if debug:
-        for verts, cyclic in sequences:
-            print(cyclic, [v.index for v in verts])
+    verts[:] = [v for v in verts if v in remaining]
 
     return sequences
 
@@ -1,5 +1,6 @@
 import bpy
 import rna_keymap_ui
+import time
 
 
 icons = None
@@ -63,6 +64,114 @@ def wrap_cursor(self, context, event, x=False, y=False):
         """
 
 
+# MODAL
+
+modal_stats = {}
+
+
+def init_modal_updates(self, budget=1 / 60):
+    '''
+    budget the work of a modal operator, which is done right away for the latest event, as long as the previous update stayed within the budget
+    if it took longer, expensive work can be deferred by checking is_modal_budget_exceeded(), and the events arriving in the meantime are coalesced into a single update
+    budget: the time in seconds an update may take
+    '''
+
+    self.TIMER = None
+
+    self.modal_budget = budget
+    self.modal_pending = False
+    self.modal_queued_time = None
+    self.modal_resume_time = 0
+
+    self.modal_stats = {'events': 0,
+                        'updates': 0,
+                        'deferred': 0,
+                        'latency_total': 0,
+                        'latency_max': 0}
+
+
+def queue_modal_update(self):
+    '''
+    mark an update as pending, while an update is deferred, several events result in a single update
+    '''
+
+    self.modal_stats['events'] += 1
+
+    if not self.modal_pending:
+        self.modal_pending = True
+        self.modal_queued_time = time.time()
+
+
+def is_modal_update_due(self, event):
+    '''
+    check if the event is the timer tick of a deferred update
+    '''
+
+    return event.type == 'TIMER' and self.TIMER and self.modal_pending
+
+
+def is_modal_budget_exceeded(self, context):
+    '''
+    check if the previous update took so long, that expensive work should be deferred, the update then stays pending
+    a timer is started, so the deferred update is done, even if no further events arrive
+    '''
+
+    now = time.time()
+
+    if now < self.modal_resume_time:
+        self.modal_stats['deferred'] += 1
+
+        if not self.TIMER:
+            self.TIMER = context.window_manager.event_timer_add(max(self.modal_resume_time - now, 0.001), window=context.window)
+
+        return True
+    return False
+
+
+def finish_modal_update(self, context, start):
+    '''
+    clear the pending update, and record its latency, which is the time from the first event it covers to now
+    an update exceeding the budget defers expensive work for as long as it exceeded it
+    '''
+
+    end = time.time()
+
+    latency = end - self.modal_queued_time if self.modal_queued_time else 0
+
+    self.modal_stats['updates'] += 1
+    self.modal_stats['latency_total'] += latency
+    self.modal_stats['latency_max'] = max(self.modal_stats['latency_max'], latency)
+
+    duration = end - start
+    self.modal_resume_time = end + duration - self.modal_budget if duration > self.modal_budget else 0
+
+    self.modal_pending = False
+    self.modal_queued_time = None
+
+    if self.TIMER:
+        context.window_manager.event_timer_remove(self.TIMER)
+        self.TIMER = None
+
+
+def finish_modal_updates(self, context, debug=False):
+    '''
+    remove the timer of a deferred update, and keep the event and latency counters of the operator's last run around in modal_stats
+    '''
+
+    if self.TIMER:
+        context.window_manager.event_timer_remove(self.TIMER)
+        self.TIMER = None
+
+    stats = self.modal_stats
+    stats['coalesced'] = stats['events'] - stats['updates']
+    stats['latency_avg'] = stats['latency_total'] / stats['updates'] if stats['updates'] else 0
+
+    modal_stats[self.bl_idname] = stats
+
+    if debug:
+        print(f"{self.bl_idname}: {stats['events']} events, {stats['updates']} updates, {stats['deferred']} deferred, latency avg {stats['latency_avg'] * 1000:.2f}ms, max {stats['latency_max'] * 1000:.2f}ms")
+
+
 # POPUP
 
 def popup_message(message, title="Info", icon="INFO", terminal=True):